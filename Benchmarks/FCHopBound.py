@@ -0,0 +1,96 @@
+import random
+
+from FractionalCascading.FCMatrix import FCMatrix
+from GeneralNodes.NodeGenerationUtils import columns_to_FullNode_list
+
+"""
+Hop-count assertion harness for FCMatrix.fc_matrix_search. Builds matrices from
+adversarial layouts and asserts that moving from any list into the following
+one never takes more than sampling_ratio - 1 steps, st. a query costs a binary
+search in the first list plus O(k).
+
+Run from the repository root: python -m Benchmarks.FCHopBound
+"""
+
+
+def _identical(n:int, k:int) -> tuple[list[list[int]], list[int]]:
+    """
+    Every dimension holds the same locations, st. each location has one
+    version per dimension competing for the same spot in each list. """
+    return [list(range(n)) for _ in range(k)], list(range(n))
+
+
+def _split(n:int, k:int) -> tuple[list[list[int]], list[int]]:
+    """
+    A few shared targets, with the remaining locations of odd dimensions all
+    below them and those of even dimensions all above them. Nodes promoted
+    from the following dimension are as far from local nodes as possible.   """
+    targets = list(range(n, 2 * n, max(1, n // 8)))
+    filler = n - len(targets)
+    columns = []
+    for d in range(1, k + 1):
+        base = 0 if d % 2 else 2 * n
+        columns.append(targets + list(range(base, base + filler)))
+    return columns, targets
+
+
+def _staircase(n:int, k:int) -> tuple[list[list[int]], list[int]]:
+    """
+    Each dimension's remaining locations lie entirely above those of the prior
+    dimension, with the shared targets interleaved at the bottom. """
+    targets = [2 * i for i in range(max(1, n // 4))]
+    filler = n - len(targets)
+    columns = []
+    for d in range(1, k + 1):
+        base = 2 * n + d * n
+        columns.append(targets + list(range(base, base + filler)))
+    return columns, targets
+
+
+def _random_shared(n:int, k:int, seed:int=0) -> tuple[list[list[int]], list[int]]:
+    """
+    Random unique locations per dimension with a shared random subset.  """
+    rng = random.Random(seed)
+    targets = rng.sample(range(10 * n), max(1, n // 4))
+    target_set = set(targets)
+    pool = [v for v in range(10 * n) if v not in target_set]
+    columns = [targets + rng.sample(pool, n - len(targets)) for _ in range(k)]
+    return columns, targets
+
+
+def check_hop_bound(n:int=256, k:int=8, sampling_ratio:int=2) -> int:
+    """
+    Query every shared target of every adversarial layout and assert the hop
+    bound, as well as agreement with the trivial solution.
+
+    Returns: int: The largest number of hops observed between two lists.   """
+
+    worst = 0
+    for layout in (_identical, _split, _staircase, _random_shared):
+        columns, targets = layout(n, k)
+        fc_matrix = FCMatrix(columns_to_FullNode_list(columns), demo=False,
+                             sampling_ratio=sampling_ratio)
+
+        for x in targets:
+            hop_counts = []
+            found = fc_matrix.fc_matrix_search(x, hop_counts=hop_counts)
+            expected = fc_matrix.trivial_solution(x)
+
+            assert len(hop_counts) == k - 1
+            # Every sampling_ratio-th node is promoted, so a bridge lands at
+            # most sampling_ratio - 1 nodes too far.
+            assert max(hop_counts, default=0) <= sampling_ratio - 1, \
+                f"{layout.__name__}: {hop_counts} for {x}"
+            for d in range(1, k + 1):
+                assert found[d].loc() == expected[d][0].loc() == x
+
+            worst = max(worst, max(hop_counts, default=0))
+
+    return worst
+
+
+if __name__ == "__main__":
+    for sampling_ratio in (1, 2, 3, 8):
+        for n, k in ((1, 1), (2, 3), (17, 5), (256, 8), (1024, 16)):
+            worst = check_hop_bound(n, k, sampling_ratio)
+            print(f"b={sampling_ratio}, n={n}, k={k}: max hops per list {worst}")
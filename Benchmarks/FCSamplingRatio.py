@@ -0,0 +1,58 @@
+import random
+import time
+import tracemalloc
+
+from FractionalCascading.FCArrayMatrix import FCArrayMatrix
+from FractionalCascading.FCMatrix import FCMatrix
+from GeneralNodes.NodeGenerationUtils import generate_FullNode_data_set
+
+"""
+Sweep the sampling ratio b of FCMatrix and FCArrayMatrix, reporting build time,
+memory held by the built structure and average successor query latency.
+
+Run from the repository root: python -m Benchmarks.FCSamplingRatio
+"""
+
+
+def measure(matrix_type:type, data_set:list, sampling_ratio:int,
+            queries:list[int]) -> tuple[float, int, float]:
+    """
+    Returns: tuple[float, int, float]:
+        Build time (s), bytes allocated by the build and still held, average
+        query time (us) of fc_matrix_successor_search.  """
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    fc_matrix = matrix_type(data_set, n_limit=0, demo=False,
+                            sampling_ratio=sampling_ratio)
+    build_time = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for x in queries:
+        fc_matrix.fc_matrix_successor_search(x)
+    query_time = (time.perf_counter() - start) / len(queries) * 1e6
+
+    return build_time, memory, query_time
+
+
+def sweep(n:int=5000, k:int=8, ratios:tuple[int]=(1, 2, 3, 4, 8, 16),
+          n_queries:int=2000) -> None:
+    data_set = generate_FullNode_data_set(n, k, 0, 100 * n, seed_with_dimension=True)
+    rng = random.Random(0)
+    queries = [rng.randrange(100 * n) for _ in range(n_queries)]
+
+    print(f"n={n}, k={k}, {n_queries} queries")
+    print(f"{'engine':>14} {'b':>3} {'build (s)':>10} {'memory (MB)':>12} " + \
+        f"{'query (us)':>11}")
+    for matrix_type in (FCMatrix, FCArrayMatrix):
+        for b in ratios:
+            build_time, memory, query_time = \
+                measure(matrix_type, data_set, b, queries)
+            print(f"{matrix_type.__name__:>14} {b:>3} {build_time:>10.3f} " + \
+                f"{memory / 2 ** 20:>12.2f} {query_time:>11.2f}")
+
+
+if __name__ == "__main__":
+    sweep()
@@ -0,0 +1,87 @@
+import sys
+import tracemalloc
+
+from FractionalCascading.FCMatrix import FCMatrix
+from FractionalCascading.FCNodeStructures import FCNode
+from GeneralNodes.DataNode import DataNode
+from GeneralNodes.FullNode import FullNode
+from GeneralNodes.LocationNode import LocationNode
+from GeneralNodes.NodeGenerationUtils import generate_FullNode_data_set
+from GeneralNodes.SingleDimNode import SingleDimNode
+from LayeredRangeTree.LayeredRangeTree import LayeredRangeTree
+from LayeredRangeTree.LayeredRangeTreeNode import LayeredRangeTreeSubNode
+from RangeTree.ArrayRangeTree import ArrayRangeTree
+from RangeTree.RangeTree import RangeTree
+from RangeTree.RangeTreeNode import RangeTreeNode
+
+"""
+Memory held by the node classes and by the structures built from them, in
+bytes per indexed point.
+
+The first table compares one instance of each __slots__ node class with an
+equivalent instance keeping the same attributes in a per-instance __dict__, as
+the classes did before. The second reports bytes per point of the data set
+itself and of each structure built over it.
+
+Run from the repository root: python -m Benchmarks.NodeMemory
+"""
+
+NODE_CLASSES = (LocationNode, DataNode, SingleDimNode, FullNode, FCNode,
+                RangeTreeNode, LayeredRangeTreeSubNode)
+
+
+def held_bytes(build) -> int:
+    """
+    Returns: int: Bytes allocated by build() and still held by its result. """
+    tracemalloc.start()
+    result = build()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return memory
+
+
+def instance_bytes(node_type:type, count:int=10000) -> tuple[float, float]:
+    """
+    Returns: tuple[float, float]:
+        Average bytes held by an instance of node_type, and by an instance of a
+        plain class holding the same attributes in its __dict__.   """
+
+    def init(self) -> None:
+        for name in node_type.__slots__:
+            setattr(self, name, None)
+
+    dict_based_type = type(node_type.__name__, (), {"__init__": init})
+    slotted = held_bytes(lambda: [node_type.__new__(node_type)
+                                  for _ in range(count)])
+    dict_based = held_bytes(lambda: [dict_based_type() for _ in range(count)])
+    # Both lists hold one pointer per instance.
+    return (slotted - 8 * count) / count, (dict_based - 8 * count) / count
+
+
+def nodes() -> None:
+    print(f"{'class':>24} {'__slots__':>10} {'__dict__':>10}")
+    for node_type in NODE_CLASSES:
+        slotted, dict_based = instance_bytes(node_type)
+        print(f"{node_type.__name__:>24} {slotted:>10.1f} {dict_based:>10.1f}")
+
+
+def structures(n:int=5000, k:int=3) -> None:
+    data_set = generate_FullNode_data_set(n, k, 0, 100 * n, seed_with_dimension=True)
+
+    print(f"\nn={n}, k={k}, bytes per point")
+    rows = (
+        ("data set", lambda: generate_FullNode_data_set(
+            n, k, 0, 100 * n, seed_with_dimension=True)),
+        ("FCMatrix", lambda: FCMatrix(data_set, n_limit=0, demo=False)),
+        (f"RangeTree k={k}", lambda: RangeTree(data_set, k)),
+        (f"ArrayRangeTree k={k}", lambda: ArrayRangeTree(data_set, k)),
+        (f"LayeredRangeTree k={k}", lambda: LayeredRangeTree(data_set, k)),
+    )
+    for name, build in rows:
+        print(f"{name:>24} {held_bytes(build) / n:>10.1f}")
+
+
+if __name__ == "__main__":
+    nodes()
+    structures()
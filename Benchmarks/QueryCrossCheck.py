@@ -0,0 +1,216 @@
+import operator
+import random
+from array import array
+from bisect import bisect_left, bisect_right
+
+from FractionalCascading.FCArrayMatrix import FCArrayMatrix
+from FractionalCascading.FCMatrix import FCMatrix
+from GeneralNodes.NodeGenerationUtils import columns_to_FullNode_list, \
+    generate_FullNode_data_set
+from RangeTree.ArrayRangeTree import ArrayRangeTree
+from RangeTree.RangeTree import RangeTree
+from Utils.CustomExceptions import NodeNotFoundInCorrectDimension
+from Utils.SearchKernels import SEARCH_KERNELS
+
+"""
+Cross-check harness for the query methods. Every Fractional Cascading engine
+is compared against its trivial_solution and against bisect over the sorted
+input lists, and the range trees against a brute force scan of the points.
+Locations are unique within each dimension, as the trivial solutions and
+RangeTree assume, and the boxes given to the range trees have range_mins no
+greater than range_maxes in each dimension.
+
+Run from the repository root: python -m Benchmarks.QueryCrossCheck
+"""
+
+
+def _columns(n:int, k:int, rng:random.Random) -> tuple[list[list[int]], list[int]]:
+    """
+    Random unique locations per dimension, from a range four times larger
+    than n, with a random subset shared by every dimension.
+
+    Returns: tuple[list[list[int]], list[int]]:
+        The columns (see columns_to_FullNode_list), and the shared locations.
+    """
+    targets = rng.sample(range(4 * n), max(1, n // 4))
+    target_set = set(targets)
+    pool = [v for v in range(4 * n) if v not in target_set]
+    return [targets + rng.sample(pool, n - len(targets)) for _ in range(k)], \
+        targets
+
+
+def _engines(columns:list[list[int]]) -> list[tuple[str, object]]:
+    """
+    Returns: list[tuple[str, object]]:
+        Every engine built over columns, by name: FCMatrix with each search
+        kernel, FCArrayMatrix, and both built from_catalogs.   """
+    data_set = columns_to_FullNode_list(columns)
+    catalogs = [sorted(column) for column in columns]
+    engines = [("FCMatrix", FCMatrix(data_set, demo=False))]
+    engines += [(f"FCMatrix[{name}]",
+                 FCMatrix(data_set, demo=False, search_kernel=name))
+                for name in SEARCH_KERNELS]
+    engines += [
+        ("FCMatrix.from_catalogs",
+         FCMatrix.from_catalogs(catalogs, demo=False)),
+        ("FCArrayMatrix", FCArrayMatrix(data_set, demo=False)),
+        ("FCArrayMatrix.from_catalogs",
+         FCArrayMatrix.from_catalogs(catalogs, demo=False))]
+    return engines
+
+
+def _hits(engine:object, x:int, start_dim:int=1,
+          end_dim:int=None) -> dict[int, tuple[int, int]]:
+    """
+    Returns: dict[int, tuple[int, int]]:
+        fc_matrix_search of either engine as key -> dimension, pair ->
+        (location, index in input).  """
+    found = engine.fc_matrix_search(x, start_dim, end_dim)
+    if isinstance(engine, FCMatrix):
+        return {d: (fc_node.loc(), fc_node.catalog_index())
+                for d, fc_node in found.items()}
+    return {d: (loc_node.loc(), rank) for d, (loc_node, rank) in found.items()}
+
+
+def check_fc_engines(n:int=64, k:int=5, seed:int=0) -> int:
+    """
+    Query every engine at each shared location, and at random locations in
+    and around the range of the input, through every query method. Asserts
+    agreement with trivial_solution and with bisect over the sorted columns.
+
+    Returns: int: The number of queries checked.   """
+
+    rng = random.Random(seed)
+    columns, targets = _columns(n, k, rng)
+    catalogs = [sorted(column) for column in columns]
+    queries = targets + [rng.randrange(-2, 4 * n + 2) for _ in range(2 * n)]
+    checked = 0
+
+    for name, engine in _engines(columns):
+        ranks = engine.fc_matrix_search_many(queries, use_numpy=False) \
+            if isinstance(engine, FCArrayMatrix) else None
+        numpy_ranks = engine.fc_matrix_search_many(queries) \
+            if isinstance(engine, FCArrayMatrix) else None
+        out = array('q', [0]) * k
+
+        for q, x in enumerate(queries):
+            expected = [bisect_left(catalog, x) for catalog in catalogs]
+            is_hit = [r < len(catalogs[d]) and catalogs[d][r] == x
+                      for d, r in enumerate(expected)]
+
+            # Search, over all dimensions and over a random run of them.
+            trivial = engine.trivial_solution(x)
+            start_dim = rng.randint(1, k)
+            end_dim = rng.randint(start_dim, k)
+            for dims in ((1, k), (start_dim, end_dim)):
+                if all(is_hit[dims[0] - 1:dims[1]]):
+                    found = _hits(engine, x, *dims)
+                    assert found == {d: (x, trivial[d][1])
+                                     for d in range(dims[0], dims[1] + 1)}, \
+                        f"{name}: search {x} in {dims}"
+                else:
+                    try:
+                        engine.fc_matrix_search(x, *dims)
+                        raise AssertionError(f"{name}: {x} found in {dims}")
+                    except NodeNotFoundInCorrectDimension:
+                        pass
+            for d in range(1, k + 1):
+                if is_hit[d - 1]:
+                    assert trivial[d][0].loc() == x and \
+                        trivial[d][1] == expected[d - 1]
+
+            # Successor and predecessor, over a run of dimensions.
+            for predecessor in (False, True):
+                found = engine.fc_matrix_successor_search(
+                    x, predecessor, start_dim, end_dim)
+                for d in range(start_dim, end_dim + 1):
+                    catalog = catalogs[d - 1]
+                    rank = bisect_right(catalog, x) - 1 if predecessor \
+                        else expected[d - 1]
+                    loc_node, found_rank = found[d]
+                    assert found_rank == rank, \
+                        f"{name}: successor {x} in {d} ({predecessor})"
+                    assert (loc_node.loc() if loc_node is not None else None) \
+                        == (catalog[rank] if 0 <= rank < len(catalog) else None)
+                assert sorted(found) == list(range(start_dim, end_dim + 1))
+
+            # Ranks into a buffer, and batched.
+            engine.fc_matrix_rank_search(x, out)
+            assert list(out) == expected, f"{name}: rank {x}"
+            if ranks is not None:
+                assert list(ranks[q * k:(q + 1) * k]) == expected, \
+                    f"{name}: search_many {x}"
+                assert list(numpy_ranks[q * k:(q + 1) * k]) == expected, \
+                    f"{name}: search_many (NumPy) {x}"
+            checked += 1
+
+        # Ranges, including empty and inverted ones.
+        for _ in range(n):
+            lo = rng.randrange(-2, 4 * n + 2)
+            hi = lo + rng.randrange(-2, n)
+            found = [(d, node.loc()) for d, node in engine.fc_matrix_range(lo, hi)]
+            assert found == [(d, loc) for d, catalog in enumerate(catalogs, 1)
+                             for loc in catalog if lo <= loc <= hi], \
+                f"{name}: range [{lo}, {hi}]"
+            checked += 1
+
+    return checked
+
+
+def check_range_trees(n:int=64, k:int=3, seed:int=0) -> int:
+    """
+    Compare orthogonal_range_search, orthogonal_range_count and
+    orthogonal_range_aggregate of RangeTree, and the search and count of
+    ArrayRangeTree, against a brute force scan of the points, over random
+    boxes, some of them empty.
+
+    Returns: int: The number of queries checked.   """
+
+    rng = random.Random(seed)
+    random.seed(seed)   # generate_FullNode_data_set draws from the module.
+    data_set = generate_FullNode_data_set(n, k, 0, 4 * n)
+    points = [([full_node.loc(d).loc() for d in range(1, k + 1)],
+               full_node.data()) for full_node in data_set]
+
+    range_tree = RangeTree(data_set, k)
+    array_range_tree = ArrayRangeTree(data_set, k)
+    aggregate_trees = (
+        (RangeTree(data_set, k, aggregate=operator.add), sum),
+        (RangeTree(data_set, k, aggregate=min), min),
+        (RangeTree(data_set, k, aggregate=max), max),
+        (RangeTree(data_set, k, aggregate=operator.add,
+                   leaf_value=lambda data: 1), len))
+    checked = 0
+
+    for _ in range(4 * n):
+        range_mins = [rng.randrange(-2, 4 * n + 2) for _ in range(k)]
+        range_maxes = [lo + rng.randrange(3 * n) for lo in range_mins]
+        expected = sorted(data for locs, data in points
+                          if all(lo <= loc <= hi for loc, lo, hi in
+                                 zip(locs, range_mins, range_maxes)))
+
+        for name, tree in (("RangeTree", range_tree),
+                           ("ArrayRangeTree", array_range_tree)):
+            found = [data_node.data() for data_node in
+                     tree.orthogonal_range_search(range_mins, range_maxes)]
+            assert found == expected, \
+                f"{name}: search {range_mins}, {range_maxes}"
+            assert tree.orthogonal_range_count(range_mins, range_maxes) == \
+                len(expected), f"{name}: count {range_mins}, {range_maxes}"
+
+        for tree, brute_force in aggregate_trees:
+            assert tree.orthogonal_range_aggregate(range_mins, range_maxes) == \
+                (brute_force(expected) if len(expected) > 0 else None), \
+                f"RangeTree: {brute_force.__name__} {range_mins}, {range_maxes}"
+        checked += 1
+
+    return checked
+
+
+if __name__ == "__main__":
+    for seed, (n, k) in enumerate(((1, 1), (2, 3), (17, 5), (64, 8), (300, 4))):
+        checked = check_fc_engines(n, k, seed)
+        print(f"FC engines, n={n}, k={k}: {checked} queries agree")
+    for seed, (n, k) in enumerate(((1, 1), (2, 2), (17, 3), (64, 2), (200, 3))):
+        checked = check_range_trees(n, k, seed)
+        print(f"Range trees, n={n}, k={k}: {checked} queries agree")
@@ -0,0 +1,75 @@
+import random
+import time
+
+from FractionalCascading.FCMatrix import FCMatrix
+from GeneralNodes.LocationNode import LocationNode
+from GeneralNodes.NodeGenerationUtils import generate_FullNode_data_set
+from GeneralNodes.NodeUtils import search_nodes, successor_search_nodes
+from RangeTree.RangeTree import RangeTree
+from Utils.SearchKernels import SEARCH_KERNELS, make_search_kernel
+
+"""
+Micro-benchmark of the search kernels in Utils.SearchKernels: the kernels on
+their own against the node searches of NodeUtils, then the queries of FCMatrix
+(first-level search and trivial_solution) and RangeTree.query_range_tree with
+each kernel selected.
+
+Run from the repository root: python -m Benchmarks.SearchKernels
+"""
+
+
+def _per_query_us(search, queries:list[int]) -> float:
+    """
+    Returns: float: Average time (us) of search(x) over queries.   """
+    start = time.perf_counter()
+    for x in queries:
+        search(x)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def kernels(sizes:tuple[int]=(10 ** 3, 10 ** 5, 10 ** 6),
+            n_queries:int=100000) -> None:
+    rng = random.Random(0)
+    print(f"Kernel lower_bound, {n_queries} queries (us per query)")
+    print(f"{'search':>22} " + " ".join(f"{f'n={n}':>10}" for n in sizes))
+
+    rows = {}
+    for n in sizes:
+        keys = sorted(rng.randrange(100 * n) for _ in range(n))
+        nodes = [LocationNode(key, 1) for key in keys]
+        queries = [rng.randrange(100 * n) for _ in range(n_queries)]
+
+        for kind in SEARCH_KERNELS:
+            kernel = make_search_kernel(kind, keys)
+            rows.setdefault(kind, []).append(
+                _per_query_us(kernel.lower_bound, queries))
+        rows.setdefault("search_nodes", []).append(
+            _per_query_us(lambda x: search_nodes(nodes, x), queries))
+        rows.setdefault("successor_search_nodes", []).append(
+            _per_query_us(lambda x: successor_search_nodes(nodes, x), queries))
+
+    for name, times in rows.items():
+        print(f"{name:>22} " + " ".join(f"{t:>10.3f}" for t in times))
+
+
+def structures(n:int=20000, k:int=8, n_queries:int=20000) -> None:
+    data_set = generate_FullNode_data_set(n, k, 0, 100 * n, seed_with_dimension=True)
+    rng = random.Random(1)
+    queries = [rng.randrange(100 * n) for _ in range(n_queries)]
+    range_tree_k = min(k, 2)    # Range tree size grows as n log^(k-1) n.
+
+    print(f"\nn={n}, k={k} (range tree k={range_tree_k}), {n_queries} queries " + \
+        "(us per query)")
+    print(f"{'kernel':>14} {'fc_search':>10} {'trivial':>10} {'range_tree':>11}")
+    for kind in (None,) + tuple(SEARCH_KERNELS):
+        fc_matrix = FCMatrix(data_set, n_limit=0, demo=False, search_kernel=kind)
+        range_tree = RangeTree(data_set, range_tree_k, search_kernel=kind)
+        print(f"{str(kind):>14} " + \
+            f"{_per_query_us(fc_matrix.fc_matrix_successor_search, queries):>10.2f} " + \
+            f"{_per_query_us(fc_matrix.trivial_solution, queries):>10.2f} " + \
+            f"{_per_query_us(range_tree.query_range_tree, queries):>11.2f}")
+
+
+if __name__ == "__main__":
+    kernels()
+    structures()
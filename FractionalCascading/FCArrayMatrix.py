@@ -0,0 +1,1156 @@
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from mmap import ACCESS_READ, mmap as memory_map
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator, MutableSequence, Sequence, Union
+
+from FractionalCascading.FCNumpyKernel import FCNumpyKernel, numpy_available
+from GeneralNodes.FullNode import FullNode
+from GeneralNodes.LocationNode import LocationNode
+from GeneralNodes.NodeUtils import fullNode_list_to_SingleDimNode_matrix, \
+    search_nodes, sort_LocationNode_list
+from Utils.CustomExceptions import InvalidDimensionalityException, \
+    InvalidInputException, InvalidTypeException, NodeNotFoundInCorrectDimension
+from Utils.GeneralUtils import check_dimension_range, index_typecode, \
+    is_sorted
+from Utils.TypeUtils import L
+
+
+# Slices of a batch handed to each worker by search_batch_parallel.
+_SLICES_PER_WORKER = 4
+
+# _origin of an entry deleted from its level since the level was built.
+_DELETED = 0
+
+# On-disk format (see FCArrayMatrix.save). All integers are little-endian and
+# every section starts on an 8 byte boundary, st. it can be cast in place.
+_FILE_MAGIC = b"FCARRAY\0"
+_FILE_VERSION = 1
+# magic, version, k, sampling ratio, key typecode ('q' or 'd')
+_FILE_HEADER = struct.Struct("<8sIIIc3x")
+# Per level: size of the augmented level, size of the input list.
+_FILE_LEVEL = struct.Struct("<qq")
+
+
+def _padded(n_bytes:int) -> int:
+    """
+    Returns: int: n_bytes rounded up to a multiple of 8.  """
+    return (n_bytes + 7) & ~7
+
+
+def _patched_array(values:Sequence[int], typecode:str, start:int, stop:int,
+                   middle:Sequence[int], delta:int=0) -> array:
+    """
+    Returns: array: New array of typecode holding values[:start], then middle,
+        then values[stop:] each plus delta. values itself, which NumPy or a
+        buffer may hold views of, is left as it is.  """
+    patched = array(typecode, values[:start])
+    patched.extend(middle)
+    patched.extend(array(typecode, values[stop:]) if delta == 0 else
+                   [value + delta for value in values[stop:]])
+    return patched
+
+
+def _file_size(sizes:Sequence[tuple[int, int]]) -> int:
+    """
+    Args: sizes (Sequence[tuple[int, int]]):
+        Per level, the size of the augmented level and of the input list.
+
+    Returns: int: Number of bytes of a matrix with those levels in the format
+        of FCArrayMatrix.save.  """
+
+    size = _FILE_HEADER.size + len(sizes) * _FILE_LEVEL.size
+    for i, (m, n) in enumerate(sizes):
+        size += 8 * m + _padded(2 * m) + 8 * (m + 1) + 8 * n
+        if i + 1 < len(sizes):
+            size += 8 * (m + 1)
+    return size
+
+
+class _CatalogView:
+    """
+    Read-only input list of an FCArrayMatrix created by load or from_catalogs.
+    Wraps the sorted locations of one dimension and only creates a LocationNode
+    for an entry once a query reports it.  """
+
+    def __init__(self, keys:Sequence[L], dimension:int) -> None:
+        self._keys = keys
+        self._dim = dimension
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __getitem__(self, index:int) -> LocationNode:
+        return LocationNode(self._keys[index], self._dim)
+
+    def locations(self) -> Sequence[L]:
+        """
+        Returns: Sequence[L]: The wrapped sorted locations. """
+        return self._keys
+
+
+class FCArrayMatrix:
+    """
+    Array-backed alternative to FCMatrix. Rather than keeping each augmented
+    list i' as a linked list of FCNodes, every level is stored as a set of
+    parallel flat arrays indexed by position in i', such that the query walks
+    integer offsets instead of chasing pointers between node objects.
+
+    Vocabulary is the same as in FCNode (local, promoted, etc.). Lists are
+    indexed by (dimension - 1).
+
+    Fields:
+        _n (int): number of nodes in each dimension, or in the largest one if
+            the catalogs differ in length (eg. built from_catalogs).
+
+        _k (int): dimensionality
+
+        _input_data (list[list[LocationNode]]):
+            matrix of LocationNode objects, each list sorted on location. These
+            are the original catalogs into which the query reports positions.
+            For a matrix created by load, read-only views of the saved
+            locations until a dimension is updated.
+
+        _keys (list[list[L]]):
+            _keys[i][j] -> location of the jth entry of augmented list (i+1)'.
+
+        _origin (list[array]):
+            _origin[i][j] -> initial dimension of the jth entry of (i+1)'. Equal
+            to i + 1 iff that entry is local, and to _DELETED if it was deleted
+            since (i+1)' was built (see delete).
+
+        _bridge (list[array]):
+            _bridge[i][j] -> index into (i+2)' of the entry from which the
+            nearest promoted entry at or after position j of (i+1)' was
+            promoted. Holds one trailing sentinel entry, such that positions
+            past the last promoted entry map to len(_keys[i + 1]). The last
+            level has no bridge and is stored as None.
+
+        _local (list[array]):
+            _local[i][j] -> number of local entries before position j in (i+1)'.
+            This is the index into _input_data[i] of the nearest local entry at
+            or after position j. Also holds one trailing sentinel entry.
+
+        _sampling_ratio (int):
+            Every _sampling_ratio-th entry of an augmented level is promoted
+            into the prior one. Larger values use less memory in exchange for up
+            to _sampling_ratio - 1 steps when moving between levels.
+
+        _patched (list[int]):
+            _patched[i] -> number of inserts into (i+1)' since level i' was
+            built, which may have widened the gaps between the entries of
+            (i+1)' promoted into i' (see insert). Always 0 for 1'.
+
+        _numpy_kernel (FCNumpyKernel):
+            NumPy export of the levels, built on first use by
+            fc_matrix_search_many. False if it cannot be built (NumPy missing
+            or non-numeric locations), None if not yet attempted.
+
+        _demo (bool): If true, have methods print progress reports.
+
+        _buffer (memoryview):
+            Buffer holding the levels of a matrix created by load or attach,
+            which all level fields are views of. None for a built matrix.
+
+        _shared_memory (SharedMemory):
+            Block backing _buffer for a matrix created by attach, else None.
+
+        _n_limit (int):
+            As this data structure exists to demonstrate performance, this is
+            for cases in which we don't need to actually store the data we find,
+            just record the query time. Arbitrarily defaults to 100 """
+
+    def __init__(self, data_set:list[FullNode], n_limit:int=100, demo:bool=True,
+                 sampling_ratio:int=2) -> None:
+        self._n, self._k = len(data_set), data_set[0].dimensionality()
+        self._input_data = fullNode_list_to_SingleDimNode_matrix(data_set, True)
+        self._init_levels(sampling_ratio, n_limit, demo)
+        self._build_fractional_cascading_matrix()
+
+
+    @classmethod
+    def from_catalogs(cls, catalogs:Sequence[Sequence[L]], n_limit:int=100,
+                      demo:bool=True, sampling_ratio:int=2) -> 'FCArrayMatrix':
+        """
+        Build the matrix directly from k sorted lists of locations, which may
+        all differ in length, rather than from FullNodes. The lists are used as
+        given, without being copied into LocationNodes; one is only created
+        for each entry a query reports.
+
+        Args:
+            catalogs (Sequence[Sequence[L]]):
+                catalogs[d - 1] -> sorted locations of dimension d. Must not be
+                modified afterwards, except through insert, delete and
+                replace_catalog.
+
+            n_limit (int), demo (bool), sampling_ratio (int):
+                As in the constructor.
+
+        Raises: InvalidInputException: If there are no catalogs or one of them
+            is not sorted.
+
+        Returns: FCArrayMatrix: The built matrix.   """
+
+        if len(catalogs) == 0:
+            raise InvalidInputException(
+                "catalogs", "[]", "at least one catalog", "FCArrayMatrix")
+        for d, catalog in enumerate(catalogs, 1):
+            if not is_sorted(catalog):
+                raise InvalidInputException(f"catalogs[{d - 1}]", "unsorted",
+                                            "sorted locations", "FCArrayMatrix")
+
+        matrix = cls.__new__(cls)
+        matrix._k = len(catalogs)
+        matrix._n = max(len(catalog) for catalog in catalogs)
+        matrix._input_data = [_CatalogView(catalog, d)
+                              for d, catalog in enumerate(catalogs, 1)]
+        matrix._init_levels(sampling_ratio, n_limit, demo)
+        matrix._build_fractional_cascading_matrix()
+        return matrix
+
+
+    def _init_levels(self, sampling_ratio:int, n_limit:int, demo:bool) -> None:
+        """
+        Set every field but _n, _k and _input_data to that of an empty matrix.
+
+        Raises: InvalidInputException: If sampling_ratio is less than 1.    """
+
+        if sampling_ratio < 1:
+            raise InvalidInputException("sampling_ratio", str(sampling_ratio),
+                                        "greater than 0", "FCArrayMatrix")
+        self._keys = [None] * self._k       # type: list[list[L]]
+        self._origin = [None] * self._k     # type: list[array]
+        self._bridge = [None] * self._k     # type: list[array]
+        self._local = [None] * self._k      # type: list[array]
+        self._patched = [0] * self._k       # type: list[int]
+        self._numpy_kernel = None           # type: FCNumpyKernel
+        self._sampling_ratio = sampling_ratio
+        self._n_limit = n_limit
+        self._demo = demo
+        self._buffer = None                 # type: memoryview
+        self._shared_memory = None          # type: SharedMemory
+
+
+    def level_size(self, dimension:int) -> int:
+        """
+        Returns: int: Number of entries in augmented list dimension'.   """
+        return len(self._keys[dimension - 1])
+
+
+    def numpy_kernel(self) -> FCNumpyKernel:
+        """
+        Export the augmented levels into NumPy arrays, if not already done.
+
+        Returns: FCNumpyKernel:
+            The exported kernel, or None if NumPy is not installed or the
+            locations are not numeric.  """
+
+        if self._numpy_kernel is None:
+            self._numpy_kernel = False
+            if numpy_available():
+                try:
+                    self._numpy_kernel = FCNumpyKernel(
+                        self._keys, self._bridge, self._local,
+                        self._max_steps() + 1)
+                except InvalidTypeException:
+                    pass
+
+        return self._numpy_kernel or None
+
+
+    ############################### Query Methods ##############################
+    def fc_matrix_search(self, x:L, start_dim:int=1,
+                         end_dim:int=None) -> dict[int, tuple[LocationNode, int]]:
+        """
+        Find the LocationNodes located at x in each dimension from start_dim
+        through end_dim. The search starts with a binary search in level
+        start_dim' and stops at end_dim', costing O(log n + end_dim - start_dim).
+
+        Args:
+            x (L): Location for which we are searching in each dimension.
+
+            start_dim (int): First dimension to search. Defaults to 1.
+
+            end_dim (int, optional): Last dimension to search. Defaults to k.
+
+        Raises:
+            NodeNotFoundInCorrectDimension:
+                If x is not located in one of the dimensions.
+
+            InvalidDimensionalityException: If either dimension is invalid.
+
+            InvalidInputException: If start_dim exceeds end_dim.
+
+        Returns: dict[int, tuple[LocationNode, int]]:
+            key -> dimension, pair -> (LocationNode of x, index of x in input)
+        """
+
+        data_locations = {}
+        keys, bridge, local = self._keys, self._bridge, self._local
+
+        end_dim = check_dimension_range(start_dim, end_dim, self._k,
+                                        "FCArrayMatrix")
+
+        # Binary search for the first entry of start_dim' with location >= x.
+        j = bisect_left(keys[start_dim - 1], x)
+
+        for i in range(start_dim - 1, end_dim):
+            # Nearest local entry at or after j is the successor of x in the
+            # input catalog of this dimension.
+            rank = local[i][j]
+            catalog = self._input_data[i]
+            if rank == len(catalog) or catalog[rank].loc() != x:
+                raise NodeNotFoundInCorrectDimension(i + 1)
+
+            if self._k < self._n_limit:
+                data_locations[i + 1] = (catalog[rank], rank)
+
+            # Follow the bridge into the following level. Promoted entries are
+            # every _sampling_ratio-th entry of that level and the one preceding
+            # the bridge is less than x, so we step back _sampling_ratio - 1
+            # times at most, or 2 * _sampling_ratio - 1 once inserts have
+            # widened the gaps between them (see insert).
+            if i + 1 < end_dim:
+                next_keys = keys[i + 1]
+                j = bridge[i][j]
+                while j > 0 and next_keys[j - 1] >= x:
+                    j -= 1
+
+        return data_locations
+
+
+    def fc_matrix_successor_search(
+        self, x:L, predecessor:bool=False, start_dim:int=1,
+        end_dim:int=None) -> dict[int, tuple[LocationNode, int]]:
+        """
+        Find the LocationNode located at x in each dimension, or its successor
+        (or predecessor if the option is enabled) should none exist. Dimensions
+        without one are reported rather than raised.
+
+        Args:
+            x (L): Location for which we are searching in each dimension.
+
+            predecessor (bool):
+                If True, and no node exists at x, report the node in the
+                preceding location. Otherwise, report successor (default).
+
+            start_dim (int), end_dim (int, optional):
+                Dimensions to search, as in fc_matrix_search.
+
+        Returns: dict[int, tuple[LocationNode, int]]:
+            key -> dimension, pair -> (LocationNode, index in input). If there
+            is no successor, (None, n). If there is no predecessor, (None, -1).
+        """
+
+        data_locations = {}
+        keys, bridge, local = self._keys, self._bridge, self._local
+
+        end_dim = check_dimension_range(start_dim, end_dim, self._k,
+                                        "FCArrayMatrix")
+        j = bisect_left(keys[start_dim - 1], x)
+
+        for i in range(start_dim - 1, end_dim):
+            rank = local[i][j]
+            catalog = self._input_data[i]
+            if predecessor and (rank == len(catalog) or catalog[rank].loc() != x):
+                rank -= 1
+
+            if self._k < self._n_limit:
+                data_locations[i + 1] = \
+                    (catalog[rank] if 0 <= rank < len(catalog) else None, rank)
+
+            if i + 1 < end_dim:
+                next_keys = keys[i + 1]
+                j = bridge[i][j]
+                while j > 0 and next_keys[j - 1] >= x:
+                    j -= 1
+
+        return data_locations
+
+
+    def fc_matrix_rank_search(self, x:L, out:MutableSequence[int],
+                              offset:int=0) -> None:
+        """
+        Successor search reporting only ranks, written into a buffer supplied by
+        the caller, st. no dict, tuple or LocationNode is created per query.
+
+        Args:
+            x (L): Location for which we are searching in each dimension.
+
+            out (MutableSequence[int]):
+                Buffer of at least offset + k integers, such as an array('q')
+                or a NumPy int64 array. out[offset + d - 1] is set to the index
+                in the input list of dimension d of x or its successor, ie. the
+                number of its locations less than x. Equal to the length of
+                that list if there is no successor.
+
+            offset (int): Position in out of the rank of dimension 1.  """
+
+        keys, bridge, local = self._keys, self._bridge, self._local
+        last = self._k - 1
+
+        j = bisect_left(keys[0], x)
+        for i in range(self._k):
+            out[offset + i] = local[i][j]
+
+            if i < last:
+                next_keys = keys[i + 1]
+                j = bridge[i][j]
+                while j > 0 and next_keys[j - 1] >= x:
+                    j -= 1
+
+
+    def fc_matrix_range(self, lo:L, hi:L) -> Iterator[tuple[int, LocationNode]]:
+        """
+        Report every location in [lo, hi] of every dimension. The successor of
+        lo in each input list is found through the cascade, after which the
+        list is read forward from there while in range, for a total cost of
+        O(log n + k + output).
+
+        Args:
+            lo (L), hi (L): Inclusive bounds of the range.
+
+        Yields: tuple[int, LocationNode]:
+            Each dimension along with one of its LocationNodes located in
+            range. Ordered by dimension, then by location.  """
+
+        if hi < lo:
+            return
+
+        keys, bridge, local = self._keys, self._bridge, self._local
+
+        j = bisect_left(keys[0], lo)
+        for i in range(self._k):
+            rank = local[i][j]
+            catalog = self._input_data[i]
+            while rank < len(catalog):
+                loc_node = catalog[rank]
+                if loc_node.loc() > hi:
+                    break
+                yield i + 1, loc_node
+                rank += 1
+
+            if i + 1 < self._k:
+                next_keys = keys[i + 1]
+                j = bridge[i][j]
+                while j > 0 and next_keys[j - 1] >= lo:
+                    j -= 1
+
+
+    def fc_matrix_search_many(self, xs:Sequence[L], use_numpy:bool=True) -> array:
+        """
+        Batched successor search. The queries are sorted once, after which each
+        level is handled in a single pass over all of them: positions in 1' are
+        found by binary searches bounded below by the previous query, and each
+        following level is reached through the bridges in O(1) per query.
+
+        If NumPy is installed and the locations are numeric, the batch is
+        instead pushed through FCNumpyKernel.search_many.
+
+        Args:
+            xs (Sequence[L]): Locations for which to search, in any order.
+
+            use_numpy (bool):
+                If False, always use the pure Python path. Defaults to True.
+
+        Returns: array:
+            Row-major (len(xs) x k) matrix of indices. The entry at
+            [q * k + (d - 1)] is the index in the input list of dimension d of
+            xs[q] or its successor, ie. the number of its locations less than
+            xs[q]. Equal to n if there is no successor.    """
+
+        k, m = self._k, len(xs)
+        kernel = self.numpy_kernel() if use_numpy else None
+        if kernel is not None:
+            ranks = array('q')
+            ranks.frombytes(kernel.search_many(xs).tobytes())
+            return ranks
+
+        order = sorted(range(m), key=xs.__getitem__)
+        sorted_xs = [xs[q] for q in order]
+        ranks = array('q', [0]) * (m * k)
+
+        # inverse[q] -> position of xs[q] within sorted_xs.
+        inverse = [0] * m
+        for s, q in enumerate(order):
+            inverse[q] = s
+
+        # Positions of each sorted query in the level currently being walked.
+        positions = [0] * m
+        first_keys, j = self._keys[0], 0
+        for s, x in enumerate(sorted_xs):
+            j = bisect_left(first_keys, x, j)
+            positions[s] = j
+
+        for i in range(k):
+            local_i = self._local[i]
+            column = [local_i[j] for j in positions]
+            ranks[i::k] = array('q', map(column.__getitem__, inverse))
+
+            if i + 1 < k:
+                bridge_i, next_keys = self._bridge[i], self._keys[i + 1]
+                positions = [bridge_i[j] for j in positions]
+
+                # At most _max_steps steps back per query, see
+                # fc_matrix_search.
+                for _ in range(self._max_steps(i + 1)):
+                    positions = [j - 1 if j > 0 and next_keys[j - 1] >= x else j
+                                 for j, x in zip(positions, sorted_xs)]
+
+        return ranks
+
+
+    def search_batch_parallel(self, xs:Sequence[L], workers:int=None,
+                              use_numpy:bool=True) -> array:
+        """
+        fc_matrix_search_many, with the batch split across a pool of worker
+        processes. The matrix is exported once into shared memory (see share),
+        to which every worker attaches read-only, and each worker searches
+        contiguous slices of xs. The results are gathered in order.
+
+        Args:
+            xs (Sequence[L]): Locations for which to search, in any order.
+
+            workers (int, optional):
+                Number of worker processes. Defaults to the number of CPUs.
+                With a single worker, the batch is searched in this process.
+
+            use_numpy (bool): As in fc_matrix_search_many.
+
+        Raises: InvalidTypeException:
+            If there is more than one worker and the locations are not numeric.
+
+        Returns: array: As in fc_matrix_search_many.    """
+
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(xs) <= workers:
+            return self.fc_matrix_search_many(xs, use_numpy)
+
+        # A few slices per worker, st. uneven slices even out.
+        n_slices = min(len(xs), _SLICES_PER_WORKER * workers)
+        bounds = [len(xs) * s // n_slices for s in range(n_slices + 1)]
+        slices = [xs[bounds[s]:bounds[s + 1]] for s in range(n_slices)]
+
+        ranks = array('q')
+        shared_memory = self.share()
+        try:
+            with ProcessPoolExecutor(workers, initializer=_attach_worker,
+                                     initargs=(shared_memory.name,)) as pool:
+                for slice_ranks in pool.map(
+                    _search_slice, slices, [use_numpy] * n_slices):
+                    ranks.extend(slice_ranks)
+        finally:
+            self.release(shared_memory)
+
+        return ranks
+
+
+    def trivial_solution(self, x:int) -> dict[int, tuple[LocationNode, int]]:
+        """
+        The trivial query solution by which to compare Fractional Cascading.
+        -> k log(n) searchs in the _input_data matrix.
+
+        Args: x (int): Location for which wto search in each dimension.
+
+        Returns: dict[int, tuple[LocationNode, int]]:
+            key -> dimension, pair -> (LocationNode of x, index of x in input)
+        """
+        ret_dict = {}
+        for i in range(self._k):
+            x_node, x_index = search_nodes(self._input_data[i], x)
+            if self._k < self._n_limit: ret_dict[i + 1] = (x_node, x_index)
+        return ret_dict
+
+
+    ############################## Update Methods ##############################
+    def insert(self, dimension:int, x:L) -> None:
+        """
+        Insert location x into the input list of a dimension, and patch
+        augmented level dimension' in place: x is inserted as a local entry of
+        that level, the local counts after it are shifted, and so are the
+        bridges of level (dimension - 1)' into it. No entry is promoted, so
+        queries still follow the same bridges and only step back over the
+        entries inserted since, as in fc_matrix_search. Once an insert widens a
+        gap between promoted entries to 2 * _sampling_ratio entries, the levels
+        below are rebuilt to promote every _sampling_ratio-th entry again.
+
+        This is a patch and rebuild scheme, not dynamic fractional cascading:
+            - An insert costs O(n) to shift the input list and the arrays of
+              two levels, plus an O(k n) rebuild of levels dimension - 1'
+              through 1' for every _sampling_ratio inserts into the same gap
+              at worst.
+            - A query still costs O(log n + k), stepping back at most
+              2 * _sampling_ratio - 1 entries per level.
+        FCMatrix stays static; its catalogs are only changed through
+        replace_catalog.
+
+        Args:
+            dimension (int): Dimension into which to insert x.
+
+            x (L): Location to insert.
+
+        Raises: InvalidDimensionalityException: If dimension is invalid.    """
+
+        i = self._start_update(dimension)
+        keys, local = self._keys[i], self._local[i]
+        catalog = self._input_data[i]
+
+        # The first entry at or after x. Local entries win ties, as in
+        # _build_augmented_level, so x goes before any entry equal to it.
+        p = bisect_left(keys, x)
+        rank = local[p]
+        keys.insert(p, x)
+        self._origin[i] = _patched_array(self._origin[i], 'H', p, p, [dimension])
+        # The new entry has as many local entries before it as the entry it
+        # displaces, which all have one more.
+        self._local[i] = _patched_array(local, index_typecode(len(catalog) + 1),
+                                        p, p, [rank], 1)
+        if self._bridge[i] is not None:
+            self._bridge[i] = _patched_array(
+                self._bridge[i], index_typecode(len(self._keys[i + 1])),
+                p, p, [self._bridge[i][p]])
+
+        gap = 0
+        if i > 0:
+            # Bridges are non-decreasing, and those at or past p now point one
+            # entry further.
+            bridge = self._bridge[i - 1]
+            shifted = bisect_left(bridge, p)
+            bridge = _patched_array(bridge, index_typecode(len(keys)),
+                                    shifted, shifted, [], 1)
+            self._bridge[i - 1] = bridge
+            self._patched[i] += 1
+
+            # Entries between the promoted entries around x, all of which a
+            # query may have to step back over.
+            q = bisect_left(self._keys[i - 1], x)
+            first = bisect_left(bridge, bridge[q], 0, q)
+            gap = bridge[q] - (bridge[first - 1] if first > 0 else -1) - 1
+
+        # Keep the dimension label of the nodes already in this dimension.
+        label = catalog[0].dim_label() if len(catalog) > 0 else None
+        catalog.insert(rank, LocationNode(x, dimension, label))
+        self._n = max(self._n, len(catalog))
+
+        if gap >= 2 * self._sampling_ratio:
+            if self._demo:
+                print(f"Rebuilding levels {dimension - 1}' through 1'.")
+            self._build_levels(dimension - 1)
+
+
+    def delete(self, dimension:int, x:L) -> None:
+        """
+        Delete one instance of location x from the input list of a dimension,
+        and patch augmented level dimension' in place. The entry of x is kept
+        in that level as a deleted one, st. the entries promoted from it still
+        bridge to it, and only the local counts after it are shifted. Gaps
+        between promoted entries are thus unchanged, and nothing is rebuilt.
+        Deleted entries are dropped the next time the level is rebuilt. An
+        update costs O(n), and queries O(log n + k) as in insert.
+
+        Args:
+            dimension (int): Dimension from which to delete x.
+
+            x (L): Location to delete.
+
+        Raises:
+            InvalidDimensionalityException: If dimension is invalid.
+
+            NodeNotFoundInCorrectDimension: If x is not in that dimension.  """
+
+        i = self._start_update(dimension)
+        keys, origin, local = self._keys[i], self._origin[i], self._local[i]
+
+        # The first local entry located at x, past any promoted or deleted one.
+        p = bisect_left(keys, x)
+        while p < len(keys) and keys[p] == x and origin[p] != dimension:
+            p += 1
+        if p == len(keys) or keys[p] != x:
+            raise NodeNotFoundInCorrectDimension(dimension)
+
+        rank = local[p]
+        self._origin[i] = _patched_array(origin, 'H', p, p + 1, [_DELETED])
+        self._local[i] = _patched_array(local, index_typecode(len(local)),
+                                        p + 1, p + 1, [], -1)
+
+        del self._input_data[i][rank]
+        self._n = max(len(catalog) for catalog in self._input_data)
+
+
+    def replace_catalog(self, dimension:int, nodes:list[LocationNode]) -> None:
+        """
+        Replace the input list of a dimension, and rebuild levels dimension'
+        through 1' only. Levels of higher dimensions, and the samples promoted
+        from them, are reused as they are. Replacing dimension k is thus a full
+        rebuild. See FCMatrix.replace_catalog.
+
+        Args:
+            dimension (int): Dimension whose input list to replace.
+
+            nodes (list[LocationNode]): New locations of that dimension. Need
+                not be sorted. The list itself is not modified.
+
+        Raises: InvalidDimensionalityException: If dimension is invalid.    """
+
+        if not 1 <= dimension <= self._k:
+            raise InvalidDimensionalityException(dimension, self._k)
+
+        catalog = list(nodes)
+        sort_LocationNode_list(catalog)
+        self._input_data[dimension - 1] = catalog
+        self._n = max(len(catalog) for catalog in self._input_data)
+
+        if self._demo:
+            print(f"Rebuilding levels {dimension}' through 1'.")
+        self._build_levels(dimension)
+
+
+    def _input_locations(self, i:int) -> Sequence[L]:
+        """
+        Returns: Sequence[L]: Sorted locations of _input_data[i]. """
+        catalog = self._input_data[i]
+        if isinstance(catalog, _CatalogView):
+            return catalog.locations()
+        return [loc_node.loc() for loc_node in catalog]
+
+
+    def _start_update(self, dimension:int) -> int:
+        """
+        Make the input list and augmented level of dimension private and
+        mutable, copying them out of any buffer or caller's list they are
+        views of, and drop the NumPy export of the levels about to change.
+
+        Raises: InvalidDimensionalityException: If dimension is invalid.
+
+        Returns: int: Index of the level of dimension.    """
+
+        if not 1 <= dimension <= self._k:
+            raise InvalidDimensionalityException(dimension, self._k)
+
+        i = dimension - 1
+        if isinstance(self._input_data[i], _CatalogView) or \
+                not isinstance(self._keys[i], list):
+            # Keys of the highest level may be the caller's catalog itself.
+            self._keys[i] = list(self._keys[i])
+        if isinstance(self._input_data[i], _CatalogView):
+            # Wrapped input lists are read-only, so copy this one out.
+            self._input_data[i] = list(self._input_data[i])
+        self._numpy_kernel = None
+        return i
+
+
+    def _max_steps(self, i:int=None) -> int:
+        """
+        Args: i (int, optional): Index of a level other than 1'. If None, the
+            most over every level.
+
+        Returns: int: Most steps back a query takes after following a bridge
+            into level (i+1)': _sampling_ratio - 1 as built, or
+            2 * _sampling_ratio - 1 once patched by insert. """
+
+        patched = any(self._patched) if i is None else self._patched[i] > 0
+        return 2 * self._sampling_ratio - 1 if patched \
+            else self._sampling_ratio - 1
+
+
+    ############################ Persistence Methods ###########################
+    def save(self, path:str) -> None:
+        """
+        Write the matrix to a versioned binary file, from which load restores it
+        without rebuilding. Levels below those patched by insert since they
+        were built are rebuilt first.
+
+        The file holds a header, the sizes of each level, then the keys,
+        origin, local and bridge arrays of each level and the locations of its
+        input list, all as flat little-endian arrays. Locations must all be
+        ints fitting in 64 bits, or ints and floats (stored as doubles).
+
+        Only locations are saved, not the LocationNodes themselves: a loaded
+        matrix reports new LocationNodes holding the dimension but no
+        dimension label, nor any payload the original nodes referred to.
+
+        Args: path (str): File to write. Overwritten if it exists.
+
+        Raises: InvalidTypeException: If the locations are not numeric. """
+
+        self._rebuild_updated_levels()
+        buffer = bytearray(self._serialized_size())
+        self._serialize_into(memoryview(buffer))
+        with open(path, "wb") as file:
+            file.write(buffer)
+
+
+    @classmethod
+    def load(cls, path:str, mmap:bool=True, n_limit:int=100,
+             demo:bool=False) -> 'FCArrayMatrix':
+        """
+        Restore a matrix written by save. No per-entry objects are created:
+        levels are used in place as views of the file, and LocationNodes are
+        only created for the entries queries report. Those LocationNodes are
+        unlabeled (see save).
+
+        Args:
+            path (str): File written by save.
+
+            mmap (bool):
+                If True (default), memory-map the file read-only, st. loading
+                costs O(k) plus page faults on first access and processes
+                loading the same file share its pages. Otherwise, read it into
+                private arrays.
+
+            n_limit (int), demo (bool): As in the constructor.
+
+        Raises: InvalidInputException: If path is not a matrix file of this
+            format version, or is truncated.
+
+        Returns: FCArrayMatrix: The loaded matrix. Updates to it are applied to
+            private copies of the affected dimensions, never to the file.   """
+
+        with open(path, "rb") as file:
+            # An empty file cannot be mapped, and is rejected by _from_buffer.
+            if mmap and os.fstat(file.fileno()).st_size > 0:
+                buffer = memoryview(memory_map(file.fileno(), 0, access=ACCESS_READ))
+            else:
+                buffer = memoryview(file.read())
+
+        return cls._from_buffer(buffer, not mmap, n_limit, demo)
+
+
+    def share(self, name:str=None) -> SharedMemory:
+        """
+        Export the matrix into a new block of shared memory, in the format of
+        save, st. worker processes can attach to it rather than each holding
+        their own copy. Levels below those patched by insert since they were
+        built are rebuilt first.
+
+        Args: name (str, optional):
+            Name of the block. If None, a unique name is generated.
+
+        Raises: InvalidTypeException: If the locations are not numeric.
+
+        Returns: SharedMemory:
+            The block, whose name is passed to attach. The caller owns it, and
+            must pass it to release once all workers are done, rather than
+            unlinking it directly (see release).   """
+
+        self._rebuild_updated_levels()
+        size = self._serialized_size()
+        shared_memory = SharedMemory(name=name, create=True, size=size)
+        self._serialize_into(shared_memory.buf[:size])
+        return shared_memory
+
+
+    @classmethod
+    def attach(cls, name:str, n_limit:int=100, demo:bool=False) -> 'FCArrayMatrix':
+        """
+        Attach read-only to a matrix exported by share. As with load, levels
+        are used in place, so no per-entry objects are copied into the calling
+        process and every attached process reads the same pages.
+
+        The attached matrix never unlinks the block, even once this process
+        exits: the caller of share owns it, and must pass it to release once
+        every attached process is done.
+
+        Args:
+            name (str): Name of the block returned by share.
+
+            n_limit (int), demo (bool): As in the constructor.
+
+        Raises: InvalidInputException: If the block does not hold a matrix of
+            this format version.
+
+        Returns: FCArrayMatrix: The attached matrix. Updates to it are applied
+            to private copies of the affected dimensions, never to the block.
+        """
+
+        try:
+            # Leave unlinking to the owner of the block (Python 3.13+).
+            shared_memory = SharedMemory(name=name, track=False)
+        except TypeError:
+            # Older versions register every attached block with the resource
+            # tracker, which would unlink it, or warn of a leak, as soon as
+            # this process exits, while the owner may still be using it.
+            shared_memory = SharedMemory(name=name)
+            if os.name == "posix":
+                resource_tracker.unregister(shared_memory._name, "shared_memory")
+
+        matrix = cls._from_buffer(
+            shared_memory.buf.toreadonly(), False, n_limit, demo, padded=True)
+        matrix._shared_memory = shared_memory
+        return matrix
+
+
+    @classmethod
+    def release(cls, shared_memory:SharedMemory) -> None:
+        """
+        Close and unlink a block returned by share, once every process attached
+        to it is done. Before Python 3.13, attach unregisters the block from the
+        resource tracker of the attaching process, which child processes share
+        with their parent, st. the tracker would fail to unregister it again
+        when unlinked. The block is registered once more first, which has no
+        effect if it still is.
+
+        Args: shared_memory (SharedMemory): Block returned by share.    """
+
+        shared_memory.close()
+        if os.name == "posix":
+            resource_tracker.register(shared_memory._name, "shared_memory")
+        shared_memory.unlink()
+
+
+    def _key_typecode(self) -> str:
+        """
+        Returns: str: Array typecode in which to store the locations.
+
+        Raises: InvalidTypeException: If the locations are not numeric. """
+
+        typecode = 'q'
+        for i in range(self._k):
+            for loc in self._input_locations(i):
+                if isinstance(loc, float):
+                    typecode = 'd'
+                elif not isinstance(loc, int) or not -2 ** 63 <= loc < 2 ** 63:
+                    raise InvalidTypeException(
+                        type(loc), "int or float locations", "FCArrayMatrix")
+        return typecode
+
+
+    def _rebuild_updated_levels(self) -> None:
+        """
+        Rebuild the levels below every level patched by insert since they were
+        built, st. promoted entries are every _sampling_ratio-th entry of each
+        level again, as a loaded matrix assumes.    """
+
+        patched = [i for i in range(self._k) if self._patched[i] > 0]
+        if len(patched) > 0:
+            if self._demo:
+                print(f"Rebuilding levels {max(patched)}' through 1'.")
+            self._build_levels(max(patched))
+
+
+    def _serialized_size(self) -> int:
+        """
+        Returns: int: Number of bytes written by _serialize_into. Levels must
+            not have been updated since they were built.    """
+
+        return _file_size([(len(self._keys[i]), len(self._input_data[i]))
+                           for i in range(self._k)])
+
+
+    def _serialize_into(self, buffer:memoryview) -> None:
+        """
+        Write the matrix in the format of save into buffer, which must hold
+        _serialized_size() bytes. Levels must not have been updated since they
+        were built.  """
+
+        key_typecode = self._key_typecode()
+        _FILE_HEADER.pack_into(buffer, 0, _FILE_MAGIC, _FILE_VERSION, self._k,
+                               self._sampling_ratio, key_typecode.encode())
+        offset = _FILE_HEADER.size
+        for i in range(self._k):
+            _FILE_LEVEL.pack_into(buffer, offset,
+                                  len(self._keys[i]), len(self._input_data[i]))
+            offset += _FILE_LEVEL.size
+
+        def write(data:bytes) -> None:
+            nonlocal offset
+            buffer[offset:offset + len(data)] = data
+            offset = _padded(offset + len(data))
+
+        for i in range(self._k):
+            write(array(key_typecode, self._keys[i]).tobytes())
+            write(array('H', self._origin[i]).tobytes())
+            write(array('q', self._local[i]).tobytes())
+            if i + 1 < self._k:
+                write(array('q', self._bridge[i]).tobytes())
+            write(array(key_typecode, self._input_locations(i)).tobytes())
+
+
+    @classmethod
+    def _from_buffer(cls, buffer:memoryview, copy:bool, n_limit:int,
+                     demo:bool, padded:bool=False) -> 'FCArrayMatrix':
+        """
+        Create a matrix from a buffer in the format of save.
+
+        Args:
+            buffer (memoryview): Bytes of a saved matrix.
+
+            copy (bool):
+                If True, copy every level out of buffer into arrays. Otherwise,
+                levels are views of buffer, which is kept alive by the matrix.
+
+            n_limit (int), demo (bool): As in the constructor.
+
+            padded (bool):
+                If True, buffer may extend past the end of the matrix (eg. a
+                block of shared memory rounded up to a whole page). Defaults to
+                False.
+
+        Raises: InvalidInputException: If buffer is not a matrix of this
+            format version, or is shorter than its header declares (eg. a
+            truncated file), or longer unless padded. """
+
+        try:
+            magic, version, k, sampling_ratio, key_typecode = \
+                _FILE_HEADER.unpack_from(buffer, 0)
+            if magic != _FILE_MAGIC or version != _FILE_VERSION:
+                raise InvalidInputException(
+                    "format", f"{magic!r} version {version}",
+                    f"{_FILE_MAGIC!r} version {_FILE_VERSION}", "FCArrayMatrix")
+            sizes = [_FILE_LEVEL.unpack_from(
+                         buffer, _FILE_HEADER.size + i * _FILE_LEVEL.size)
+                     for i in range(k)]
+        except struct.error:
+            raise InvalidInputException("buffer", f"{len(buffer)} bytes",
+                                        "a saved FCArrayMatrix", "FCArrayMatrix")
+        key_typecode = key_typecode.decode("latin-1")
+        if key_typecode not in ('q', 'd') or \
+                any(m < 0 or n < 0 for m, n in sizes) or \
+                len(buffer) < _file_size(sizes) or \
+                (not padded and len(buffer) > _file_size(sizes)):
+            raise InvalidInputException(
+                "buffer", f"{len(buffer)} bytes, keys of type {key_typecode!r}",
+                f"{_file_size(sizes)} bytes, keys of type 'q' or 'd', as " + \
+                    "declared by its header", "FCArrayMatrix")
+        buffer = buffer[:_file_size(sizes)]
+
+        offset = _FILE_HEADER.size + k * _FILE_LEVEL.size
+
+        def read(typecode:str, length:int) -> Union[array, memoryview]:
+            nonlocal offset
+            n_bytes = length * array(typecode).itemsize
+            section = buffer[offset:offset + _padded(n_bytes)]
+            offset += _padded(n_bytes)
+            if not copy:
+                return section.cast(typecode)[:length]
+            copied = array(typecode)
+            copied.frombytes(section[:n_bytes])
+            return copied
+
+        matrix = cls.__new__(cls)
+        matrix._k = k
+        matrix._init_levels(sampling_ratio, n_limit, demo)
+        matrix._input_data = [None] * k
+        for i, (m, n) in enumerate(sizes):
+            keys = read(key_typecode, m)
+            matrix._keys[i] = keys.tolist() if copy else keys
+            matrix._origin[i] = read('H', m)
+            matrix._local[i] = read('q', m + 1)
+            if i + 1 < k:
+                matrix._bridge[i] = read('q', m + 1)
+            matrix._input_data[i] = _CatalogView(read(key_typecode, n), i + 1)
+
+        matrix._n = max((n for _, n in sizes), default=0)
+        matrix._buffer = None if copy else buffer
+        if demo:
+            print(f"Loaded {k} augmented levels.")
+        return matrix
+
+
+    ########################### Matrix Setup Methods ###########################
+    def _build_fractional_cascading_matrix(self) -> None:
+        """
+        Walking from the highest dimension to the lowest, merge the locations of
+        the current dimension with every _sampling_ratio-th entry of the
+        augmented level of the prior dimension into the augmented level of the
+        current dimension.  """
+
+        if self._demo: print("Converting input into augmented arrays.")
+        self._build_levels(self._k)
+
+
+    def _build_levels(self, dimension:int) -> None:
+        """
+        (Re)build augmented levels dimension' through 1', reusing the levels of
+        all higher dimensions as they are.
+
+        Args: dimension (int): Highest dimension whose level is (re)built.  """
+
+        for i in reversed(range(dimension)):
+            if i == self._k - 1:
+                # The highest dimension has nothing promoted into it.
+                top_keys = self._input_locations(i)
+                self._keys[i] = top_keys
+                self._origin[i] = array('H', [self._k]) * len(top_keys)
+                self._local[i] = array(
+                    index_typecode(len(top_keys)), range(len(top_keys) + 1))
+            else:
+                if self._demo:
+                    print(f"Promoting nodes from dimension {i + 2} into {i + 1}.")
+                self._build_augmented_level(i)
+                self._patched[i + 1] = 0
+
+        # Kernel arrays are views of the replaced levels.
+        self._numpy_kernel = None
+
+
+    def _build_augmented_level(self, i:int) -> None:
+        """
+        Populate the arrays of augmented level (i+1)' by merging all locations
+        of _input_data[i] with every _sampling_ratio-th entry of level (i+2)'.
+        Ties are broken in favour of the local entry, as in FCMatrix.
+
+        Args: i (int): Index of the level to build. Level i + 1 must be built.
+        """
+
+        local_keys = self._input_locations(i)
+        next_keys, next_origin = self._keys[i + 1], self._origin[i + 1]
+
+        n_local, n_next = len(local_keys), len(next_keys)
+        promoted = range(0, n_next, self._sampling_ratio)
+        n_promoted = len(promoted)
+        m = n_local + n_promoted
+
+        keys = [None] * m
+        origin = array('H', [0]) * m
+        local = array(index_typecode(n_local), [0]) * (m + 1)
+        bridge = array(index_typecode(n_next), [0]) * (m + 1)
+
+        a = b = 0       # Cursors into local_keys and promoted respectively.
+        unbridged = 0   # First position whose bridge has not been assigned.
+        for j in range(m):
+            local[j] = a
+            if b == n_promoted or \
+                (a < n_local and local_keys[a] <= next_keys[promoted[b]]):
+                keys[j] = local_keys[a]
+                origin[j] = i + 1
+                a += 1
+            else:
+                source = promoted[b]
+                keys[j] = next_keys[source]
+                origin[j] = next_origin[source]
+                b += 1
+
+                # Every position since the last promoted entry bridges here.
+                for p in range(unbridged, j + 1):
+                    bridge[p] = source
+                unbridged = j + 1
+
+        local[m] = n_local
+        for p in range(unbridged, m + 1):
+            bridge[p] = n_next
+
+        self._keys[i], self._origin[i] = keys, origin
+        self._local[i], self._bridge[i] = local, bridge
+
+
+######################## search_batch_parallel Workers #########################
+# Matrix attached by each worker process of search_batch_parallel.
+_worker_matrix = None    # type: FCArrayMatrix
+
+
+def _attach_worker(name:str) -> None:
+    """
+    Pool initializer. Attach this worker to the shared matrix named name. """
+    global _worker_matrix
+    _worker_matrix = FCArrayMatrix.attach(name, demo=False)
+
+
+def _search_slice(xs:Sequence[L], use_numpy:bool) -> array:
+    """
+    Returns: array: fc_matrix_search_many of the attached matrix over xs.  """
+    return _worker_matrix.fc_matrix_search_many(xs, use_numpy)
@@ -0,0 +1,267 @@
+from array import array
+from bisect import bisect_left
+from heapq import merge
+from operator import itemgetter
+from typing import Hashable, Sequence
+
+from Utils.CustomExceptions import InvalidInputException
+from Utils.GeneralUtils import index_typecode
+from Utils.TypeUtils import L
+
+_LOCAL = -1     # Source tag of entries local to the augmented catalog.
+
+
+class FCCatalogGraph:
+    """
+    Fractional cascading over a directed acyclic graph of catalogs, rather than
+    the chain of dimensions 1..k used by FCMatrix. A query follows a path
+    through the graph and pays one binary search in the first catalog plus
+    O(1) steps per edge.
+
+    Each catalog u is augmented with every _sampling_ratio-th entry of the
+    augmented catalog of each of its children, and stores one bridge array per
+    child. Levels are kept as flat arrays, as in FCArrayMatrix.
+
+    Catalogs are referred to by their given (hashable) ids. Internally they are
+    numbered in the order given to the constructor.
+
+    Fields:
+        _ids (list[Hashable]): _ids[u] -> id of catalog u.
+
+        _index (dict[Hashable, int]): Inverse of _ids.
+
+        _children (list[list[int]]): _children[u] -> catalogs reachable from u.
+
+        _catalogs (list[list[L]]): _catalogs[u] -> sorted locations of u.
+
+        _keys (list[list[L]]): _keys[u] -> locations of augmented catalog u'.
+
+        _local (list[array]):
+            _local[u][j] -> number of entries local to u before position j of
+            u', ie. the index into _catalogs[u] of the nearest local entry at or
+            after j. Holds one trailing sentinel entry.
+
+        _bridges (list[dict[int, array]]):
+            _bridges[u][v][j] -> index into v' of the entry from which the
+            nearest entry of u' at or after j sampled from v was promoted. Holds
+            one trailing sentinel entry equal to len(_keys[v]).
+
+        _sampling_ratio (int):
+            Every _sampling_ratio-th entry of an augmented catalog is promoted
+            into each of its parents. Must exceed the in- and out-degrees of the
+            graph for the augmented catalogs to stay linear in size. """
+
+    def __init__(self, catalogs:dict[Hashable, Sequence[L]],
+                 children:dict[Hashable, Sequence[Hashable]],
+                 sampling_ratio:int=None, demo:bool=False) -> None:
+        """
+        Args:
+            catalogs (dict[Hashable, Sequence[L]]):
+                Locations of each catalog, by catalog id. Need not be sorted.
+
+            children (dict[Hashable, Sequence[Hashable]]):
+                Edges of the graph. A query may move from a catalog to any of
+                its children. Catalogs without children may be omitted.
+
+            sampling_ratio (int, optional):
+                If None, defaults to twice the largest in- or out-degree of the
+                graph (at least 2).
+
+            demo (bool): If true, print progress reports.
+
+        Raises: InvalidInputException:
+            If an edge refers to an unknown catalog or the graph has a cycle.
+        """
+
+        self._ids = list(catalogs.keys())
+        self._index = {c_id: u for u, c_id in enumerate(self._ids)}
+        self._catalogs = [sorted(catalogs[c_id]) for c_id in self._ids]
+
+        self._children = [[] for _ in self._ids]    # type: list[list[int]]
+        in_degree = [0] * len(self._ids)
+        for c_id, child_ids in children.items():
+            for child_id in child_ids:
+                if c_id not in self._index or child_id not in self._index:
+                    raise InvalidInputException(
+                        "children", f"{c_id} -> {child_id}",
+                        "an edge between known catalogs", "FCCatalogGraph")
+                self._children[self._index[c_id]].append(self._index[child_id])
+                in_degree[self._index[child_id]] += 1
+
+        if sampling_ratio is None:
+            max_degree = max(
+                [len(c) for c in self._children] + in_degree + [1])
+            sampling_ratio = 2 * max_degree
+        if sampling_ratio < 1:
+            raise InvalidInputException("sampling_ratio", str(sampling_ratio),
+                                        "greater than 0", "FCCatalogGraph")
+        self._sampling_ratio = sampling_ratio
+
+        self._keys = [None] * len(self._ids)        # type: list[list[L]]
+        self._local = [None] * len(self._ids)       # type: list[array]
+        self._bridges = [None] * len(self._ids)     # type: list[dict[int, array]]
+
+        for u in self._children_first_order():
+            if demo:
+                print(f"Augmenting catalog {self._ids[u]} with " + \
+                    f"{[self._ids[v] for v in self._children[u]]}.")
+            self._build_augmented_catalog(u)
+
+
+    ############################### Query Methods ##############################
+    def fc_path_search(self, x:L,
+                       path:Sequence[Hashable]) -> dict[Hashable, tuple[L, int]]:
+        """
+        Find the successor of x in every catalog along a path of the graph.
+
+        Args:
+            x (L): Location for which we are searching.
+
+            path (Sequence[Hashable]):
+                Catalog ids, each one a child of the one before it.
+
+        Raises: InvalidInputException: If path does not follow the edges.
+
+        Returns: dict[Hashable, tuple[L, int]]:
+            key -> catalog id, pair -> (location of x or its successor, index
+            of it in the catalog). (None, len(catalog)) if there is none.   """
+
+        data_locations = {}
+        if len(path) == 0:
+            return data_locations
+
+        keys, local, bridges = self._keys, self._local, self._bridges
+        u = self._catalog_index(path[0])
+        j = bisect_left(keys[u], x)
+
+        for step in range(len(path)):
+            rank = local[u][j]
+            catalog = self._catalogs[u]
+            data_locations[path[step]] = \
+                (catalog[rank] if rank < len(catalog) else None, rank)
+
+            if step + 1 == len(path):
+                break
+
+            # Follow the bridge into the child, stepping back at most
+            # _sampling_ratio - 1 times as in FCArrayMatrix.
+            v = self._catalog_index(path[step + 1])
+            if v not in bridges[u]:
+                raise InvalidInputException(
+                    "path", f"{path[step]} -> {path[step + 1]}",
+                    "a path following the edges of the graph", "fc_path_search")
+
+            next_keys = keys[v]
+            j = bridges[u][v][j]
+            while j > 0 and next_keys[j - 1] >= x:
+                j -= 1
+            u = v
+
+        return data_locations
+
+
+    def trivial_path_search(self, x:L,
+                            path:Sequence[Hashable]) -> dict[Hashable, tuple[L, int]]:
+        """
+        The trivial solution by which to compare fc_path_search. One binary
+        search per catalog along path.  """
+
+        data_locations = {}
+        for c_id in path:
+            catalog = self._catalogs[self._catalog_index(c_id)]
+            rank = bisect_left(catalog, x)
+            data_locations[c_id] = \
+                (catalog[rank] if rank < len(catalog) else None, rank)
+        return data_locations
+
+
+    def _catalog_index(self, c_id:Hashable) -> int:
+        if c_id not in self._index:
+            raise InvalidInputException(
+                "catalog id", str(c_id), "a known catalog", "FCCatalogGraph")
+        return self._index[c_id]
+
+
+    ########################### Graph Setup Methods ############################
+    def _children_first_order(self) -> list[int]:
+        """
+        Returns: list[int]:
+            All catalogs, each one after all of its children (reverse
+            topological order).
+
+        Raises: InvalidInputException: If the graph has a cycle. """
+
+        UNSEEN, OPEN, DONE = 0, 1, 2
+        state = [UNSEEN] * len(self._ids)
+        order = []
+
+        for root in range(len(self._ids)):
+            if state[root] != UNSEEN:
+                continue
+
+            # Iterative DFS, st. deep hierarchies don't hit the recursion limit.
+            state[root] = OPEN
+            stack = [(root, iter(self._children[root]))]
+            while len(stack) > 0:
+                u, child_iter = stack[-1]
+                v = next(child_iter, None)
+                if v is None:
+                    state[u] = DONE
+                    order.append(u)
+                    stack.pop()
+                elif state[v] == OPEN:
+                    raise InvalidInputException(
+                        "children", f"a cycle through {self._ids[v]}",
+                        "an acyclic graph", "FCCatalogGraph")
+                elif state[v] == UNSEEN:
+                    state[v] = OPEN
+                    stack.append((v, iter(self._children[v])))
+
+        return order
+
+
+    def _build_augmented_catalog(self, u:int) -> None:
+        """
+        Merge the locations of catalog u with every _sampling_ratio-th entry of
+        the augmented catalog of each child, and assign the bridge arrays.
+        Ties are broken in favour of local entries, then by child order.
+
+        Args: u (int): Catalog to augment. Its children must be augmented. """
+
+        step = self._sampling_ratio
+        children = self._children[u]
+
+        # Streams of (location, source tag, index in source).
+        streams = [[(loc, _LOCAL, i) for i, loc in enumerate(self._catalogs[u])]]
+        for tag, v in enumerate(children):
+            child_keys = self._keys[v]
+            streams.append([(child_keys[s], tag, s)
+                            for s in range(0, len(child_keys), step)])
+
+        m = sum(len(stream) for stream in streams)
+        keys = [None] * m
+        local = array(index_typecode(len(self._catalogs[u])), [0]) * (m + 1)
+        bridges = [array(index_typecode(len(self._keys[v])), [0]) * (m + 1)
+                   for v in children]
+        unbridged = [0] * len(children)
+
+        n_local = 0
+        for j, (loc, tag, source) in enumerate(merge(*streams, key=itemgetter(0))):
+            keys[j] = loc
+            local[j] = n_local
+            if tag == _LOCAL:
+                n_local += 1
+            else:
+                bridge = bridges[tag]
+                for p in range(unbridged[tag], j + 1):
+                    bridge[p] = source
+                unbridged[tag] = j + 1
+
+        local[m] = n_local
+        for tag, v in enumerate(children):
+            bridge = bridges[tag]
+            for p in range(unbridged[tag], m + 1):
+                bridge[p] = len(self._keys[v])
+
+        self._keys[u], self._local[u] = keys, local
+        self._bridges[u] = {v: bridges[tag] for tag, v in enumerate(children)}
@@ -1,8 +1,18 @@
-from FractionalCascading.FCNodeStructures import FCNode, FCList
+import gc
+from sys import getsizeof
+from typing import Iterator, MutableSequence, Sequence
+
+from FractionalCascading.FCNodeStructures import FCNode, FCList, \
+    build_augmented_level
 from GeneralNodes.FullNode import FullNode
 from GeneralNodes.LocationNode import LocationNode
-from GeneralNodes.NodeUtils import fullNode_list_to_SingleDimNode_matrix, search_nodes
-from Utils.CustomExceptions import NodeNotFoundInCorrectDimension
+from GeneralNodes.NodeUtils import fullNode_list_to_SingleDimNode_matrix, \
+    search_nodes, sort_LocationNode_list, successor_search_nodes
+from Utils.CustomExceptions import InvalidDimensionalityException, \
+    InvalidInputException, NodeNotFoundInCorrectDimension
+from Utils.GeneralUtils import check_dimension_range, is_sorted
+from Utils.MemoryUtils import MemoryReport
+from Utils.SearchKernels import SEARCH_KERNELS, SearchKernel, make_search_kernel
 from Utils.TypeUtils import L
 
 
@@ -12,8 +22,13 @@ class FCMatrix:
     will be a list of linked lists with the exception of the zeroth element,
     which will be indexed so that a binary search can be performed on it.
     
+    The matrix is static: it has no insert or delete, and a catalog can only
+    be changed by rebuilding from it through replace_catalog. See
+    FCArrayMatrix.insert for the array-backed engine's update path.
+    
     Fields:
-        _n (int): number of nodes in each dimension.
+        _n (int): number of nodes in each dimension, or in the largest one if
+            the catalogs differ in length (eg. built from_catalogs).
         
         _k (int): dimensionality
         
@@ -24,6 +39,24 @@ class FCMatrix:
             The matrix created via fractional cascading. It is a list of linked
             lists of FCNodes.   
             
+        _indexed_levels (list[list[FCNode]]):
+            _indexed_levels[i] -> list (i+1)' as an indexed list, st. a search
+            can start with a binary search in any of them.
+            
+        _search_kernel (str):
+            Name of the SearchKernel (see Utils.SearchKernels) used for the 
+            first search of a query and by trivial_solution. If None 
+            (default), the nodes themselves are binary searched.
+            
+        _level_kernels (list[SearchKernel]), _input_kernels (list[SearchKernel]):
+            Kernels over the locations of _indexed_levels[i] and of 
+            _input_data[i] respectively. None unless _search_kernel is set.
+            
+        _sampling_ratio (int):
+            Every _sampling_ratio-th node of an augmented list is promoted into 
+            the prior one. Larger values use less memory in exchange for up to
+            _sampling_ratio - 1 steps when moving between lists. Defaults to 2.
+            
         _demo (bool): If true, have methods print progress reports. 
         
         _n_limit (int): 
@@ -31,16 +64,78 @@ class FCMatrix:
             for cases in which we don't need to actually store the data we find,
             just record the query time. Arbitrarily defaults to 100 """
     
-    def __init__(self, data_set:list[FullNode], n_limit:int=100, demo:bool=True) -> None:
+    def __init__(self, data_set:list[FullNode], n_limit:int=100, demo:bool=True,
+                 sampling_ratio:int=2, search_kernel:str=None) -> None:
         self._n, self._k = len(data_set), data_set[0].dimensionality()
         self._input_data = fullNode_list_to_SingleDimNode_matrix(data_set, True)
+        self._setup(n_limit, demo, sampling_ratio, search_kernel)
+        
+        
+    @classmethod
+    def from_catalogs(cls, catalogs:Sequence[Sequence[L]], n_limit:int=100,
+                      demo:bool=True, sampling_ratio:int=2,
+                      search_kernel:str=None) -> 'FCMatrix':
+        """
+        Build the matrix directly from k sorted lists of locations, which may
+        all differ in length, rather than from FullNodes whose coordinates
+        would have to be padded out to a common length.
+
+        Args:
+            catalogs (Sequence[Sequence[L]]): 
+                catalogs[d - 1] -> sorted locations of dimension d.
+            
+            n_limit (int), demo (bool), sampling_ratio (int), 
+            search_kernel (str): As in the constructor.
+
+        Raises: InvalidInputException: If there are no catalogs or one of them
+            is not sorted.
+
+        Returns: FCMatrix: The built matrix.    """
+        
+        if len(catalogs) == 0:
+            raise InvalidInputException(
+                "catalogs", "[]", "at least one catalog", "FCMatrix")
+        for d, catalog in enumerate(catalogs, 1):
+            if not is_sorted(catalog):
+                raise InvalidInputException(f"catalogs[{d - 1}]", "unsorted",
+                                            "sorted locations", "FCMatrix")
+        
+        fc_matrix = cls.__new__(cls)
+        fc_matrix._k = len(catalogs)
+        fc_matrix._n = max(len(catalog) for catalog in catalogs)
+        fc_matrix._input_data = [[LocationNode(loc, d) for loc in catalog]
+                                 for d, catalog in enumerate(catalogs, 1)]
+        fc_matrix._setup(n_limit, demo, sampling_ratio, search_kernel)
+        return fc_matrix
+    
+    
+    def _setup(self, n_limit:int, demo:bool, sampling_ratio:int,
+               search_kernel:str) -> None:
+        """
+        Store the remaining parameters and build the matrix from _input_data.
+        
+        Raises: InvalidInputException: 
+            If sampling_ratio is less than 1 or search_kernel is unknown.  """
+        
+        if sampling_ratio < 1:
+            raise InvalidInputException("sampling_ratio", str(sampling_ratio),
+                                        "greater than 0", "FCMatrix")
+        if search_kernel is not None and search_kernel not in SEARCH_KERNELS:
+            raise InvalidInputException("search_kernel", str(search_kernel),
+                                        f"one of {list(SEARCH_KERNELS)}",
+                                        "FCMatrix")
+        
         self._fc_matrix = [FCList() for _ in range(self._k)]
+        self._indexed_levels = [None] * self._k     # type: list[list[FCNode]]
+        self._search_kernel = search_kernel
+        self._level_kernels = [None] * self._k      # type: list[SearchKernel]
+        self._input_kernels = [None] * self._k      # type: list[SearchKernel]
         self._n_limit = n_limit
         self._demo = demo
+        self._sampling_ratio = sampling_ratio
         
         # Setup after parameters have been stored.
         self._build_fractional_cascading_matrix()
-        self._first_dim_list = self._fc_matrix[0].to_list()
         
         
     def get_fc_matrix(self) -> list[FCList]:
@@ -59,84 +154,249 @@ class FCMatrix:
             current_node.loc() == target_data and \
                 current_node.dim() == target_dim == current_node.base_dim()
     
-    def fc_matrix_search(self, x:L) -> dict[int, FCNode]:
+    def fc_matrix_search(self, x:L, start_dim:int=1, end_dim:int=None, *,
+                         hop_counts:list[int]=None) -> dict[int, FCNode]:
         """
-        Find FCNodes located at x (or its successor) in each dimension.
+        Find FCNodes located at x in each dimension from start_dim through
+        end_dim. The search starts with a binary search in list start_dim' and
+        stops at end_dim', costing O(log n + end_dim - start_dim).
 
-        Args: x (L): Location for which we are searching in each dimension.
+        Args: 
+            x (L): Location for which we are searching in each dimension.
+            
+            start_dim (int): First dimension to search. Defaults to 1.
+            
+            end_dim (int, optional): Last dimension to search. Defaults to k.
+            
+            hop_counts (list[int], optional):
+                Keyword only. If not None, the number of list steps taken when 
+                moving into each following dimension is appended to it. Only 
+                used to demonstrate that these are bounded.
+        
+        Raises: 
+            NodeNotFoundInCorrectDimension: 
+                If x is not located in one of the dimensions.
+            
+            InvalidDimensionalityException: If either dimension is invalid.
+            
+            InvalidInputException: If start_dim exceeds end_dim.
 
         Returns: dict[int, FCNode]: key -> dimension
                                     pair -> associated FCNode   """
                                     
-        data_locations = {} # type: dict[int, tuple[FCNode, int]]
-        target_dim = 1
+        data_locations = {} # type: dict[int, FCNode]
         
-        # Binary search for x in first dimension:
-        # -> First level must be an indexed list from a binary search.
-        #    (Remaining levels are linked lists.)
-        cur_node, _ = search_nodes(self._first_dim_list, x)
-
-        # Walk through promoted node pointers, from list 2' through list (k-1)'
-        while target_dim < self._k:
-            
-            # Ensure x_obj is in the correct dimension. If not check neighbors
-            if cur_node.base_dim() != target_dim:
+        for target_dim, local_node in \
+            self._walk(x, start_dim, end_dim, hop_counts):
+            if not self.target_node(local_node, x, target_dim):
+                raise NodeNotFoundInCorrectDimension(target_dim)
+                
+            if self._k < self._n_limit:
+                data_locations[target_dim] = local_node
 
-                # Because cur_node is not originally from the current dimension,
-                # prev_fc_node and nex_fc_node are guaranteed to be.
-                prev_fc_node = cur_node.prev_foreign_neighbor()
-                next_fc_node = cur_node.next_foreign_neighbor()
-                if self.target_node(prev_fc_node, x, target_dim):
-                    cur_node = prev_fc_node
+        return data_locations
+    
+    
+    def fc_matrix_successor_search(
+        self, x:L, predecessor:bool=False, start_dim:int=1,
+        end_dim:int=None) -> dict[int, tuple[LocationNode, int]]:
+        """
+        Find the LocationNode located at x in each dimension, or its successor
+        (or predecessor if the option is enabled) should none exist. Dimensions
+        without one are reported rather than raised. Reports the input 
+        LocationNodes, as FCArrayMatrix.fc_matrix_successor_search does, rather
+        than the FCNodes wrapping them.
 
-                    print(cur_node)
-                    
-                # These cases are for when we are looking for a value expected
-                # in each dimension st. seccessors and predecessors are
-                # irrelevant. Otherwise just return next_fc_node st. that it 
-                # defaults to the successor of the target node.
-                ################################################################
-                elif self.target_node(next_fc_node, x, target_dim):
-                    cur_node = next_fc_node
+        Args:
+            x (L): Location for which we are searching in each dimension.
+            
+            predecessor (bool): 
+                If True, and no node exists at x, report the node in the 
+                preceding location. Otherwise, report successor (default).
+                
+            start_dim (int), end_dim (int, optional): 
+                Dimensions to search, as in fc_matrix_search.
 
-                else:
-                    raise NodeNotFoundInCorrectDimension(target_dim)
-                ################################################################
-                # cur_node = next_fc_node
-                ################################################################
+        Returns: dict[int, tuple[LocationNode, int]]: 
+            key -> dimension, pair -> (LocationNode, index in input). If there 
+            is no successor, (None, n). If there is no predecessor, (None, -1).
+        """
+            
+        data_locations = {} # type: dict[int, tuple[LocationNode, int]]
+        
+        for target_dim, local_node in \
+            self._walk(x, start_dim, end_dim):
+            if local_node is None:
+                rank = len(self._input_data[target_dim - 1])
+            else:
+                rank = local_node.catalog_index()
+            
+            if predecessor and (local_node is None or local_node.loc() != x):
+                local_node = self._prev_local_node(local_node, target_dim)
+                rank -= 1
                 
             if self._k < self._n_limit:
-                data_locations[target_dim] = cur_node
-            
-            # cur_node is now the correct version of x (initially of the the 
-            # current dimension). Now, in order to find the version of x
-            # local to the prior dimension, we must use the range bounded by its 
-            # (guaranteed foreign) prev_foreign_neighbor and 
-            # prev_foreign_neighbor. If either doesn't exist, use the head/tail 
-            # of the linked lists of the prior dimension.
-            target_dim += 1
-            found = False
-            
-            low_range = self._get_fc_list_head(target_dim) if \
-                cur_node.prev_foreign_neighbor() is None else \
-                    cur_node.prev_foreign_neighbor().prev_dim_variant()
-                    
-            high_range = self._get_fc_list_tail(target_dim) if \
-                cur_node.next_foreign_neighbor() is None else \
-                    cur_node.next_foreign_neighbor().prev_dim_variant()
-                    
-            while low_range.loc() <= high_range.loc():
-                if self.target_node(low_range, x, target_dim):
-                    cur_node = low_range
-                    found = True
-                    break
-                low_range = low_range.next_list_neighbor()
+                data_locations[target_dim] = (None if local_node is None 
+                                              else local_node.base_node(), rank)
                 
-            if not found:
-                raise NodeNotFoundInCorrectDimension(target_dim)
+        return data_locations
+    
+    
+    def fc_matrix_rank_search(self, x:L, out:MutableSequence[int], 
+                              offset:int=0) -> None:
+        """
+        Successor search reporting only ranks, written into a buffer supplied by
+        the caller rather than a dict of FCNodes. See 
+        FCArrayMatrix.fc_matrix_rank_search.
+
+        Args:
+            x (L): Location for which we are searching in each dimension.
+            
+            out (MutableSequence[int]): 
+                Buffer of at least offset + k integers, such as an array('q').
+                out[offset + d - 1] is set to the index in the input list of 
+                dimension d of x or its successor, or the length of that list
+                if there is none.
+            
+            offset (int): Position in out of the rank of dimension 1.  """
             
+        for target_dim, local_node in self._walk(x):
+            out[offset + target_dim - 1] = \
+                len(self._input_data[target_dim - 1]) if local_node is None \
+                    else local_node.catalog_index()
+    
+    
+    def fc_matrix_range(self, lo:L, hi:L) -> Iterator[tuple[int, LocationNode]]:
+        """
+        Report every location in [lo, hi] of every dimension. The first local
+        node at or after lo in each list is found through the cascade, after
+        which the local nodes of that list are followed while in range, skipping
+        over each run of promoted nodes through its next foreign neighbor. The
+        total cost is O(log n + k + output).
 
-        return data_locations
+        Args: lo (L), hi (L): Inclusive bounds of the range.
+
+        Yields: tuple[int, LocationNode]:
+            Each dimension along with one of its LocationNodes located in 
+            range. Ordered by dimension, then by location.  """
+            
+        if hi < lo:
+            return
+            
+        for target_dim, local_node in self._walk(lo):
+            while local_node is not None and local_node.loc() <= hi:
+                yield target_dim, local_node.base_node()
+                local_node = local_node.next_list_neighbor()
+                if local_node is not None and local_node.is_promoted():
+                    local_node = local_node.next_foreign_neighbor()
+    
+    
+    def _walk(self, x:L, start_dim:int=1, end_dim:int=None,
+              hop_counts:list[int]=None) -> Iterator[tuple[int, FCNode]]:
+        """
+        Walk through bridge pointers from list start_dim' through list end_dim'.
+
+        Args:
+            x (L): Location for which we are searching in each dimension.
+            
+            start_dim (int), end_dim (int, optional): See fc_matrix_search.
+            
+            hop_counts (list[int], optional): See fc_matrix_search.
+
+        Yields: tuple[int, FCNode]: 
+            Each dimension along with the first node local to it located at or
+            after x. The node is None should every local node be less than x.
+        """
+        
+        end_dim = check_dimension_range(start_dim, end_dim, self._k, "FCMatrix")
+        
+        # Binary search for the first node at or after x in the first list:
+        # -> It must be an indexed list for a binary search.
+        #    (Remaining lists are walked as linked lists.)
+        first_level = self._indexed_levels[start_dim - 1]
+        if self._search_kernel is None:
+            cur_node, _ = successor_search_nodes(first_level, x)
+        else:
+            j = self._level_kernels[start_dim - 1].lower_bound(x)
+            cur_node = first_level[j] if j < len(first_level) else None
+
+        for target_dim in range(start_dim, end_dim + 1):
+            
+            # cur_node is the first node of this list located at or after x. If
+            # it is promoted, its next foreign neighbor is the nearest local.
+            local_node = cur_node
+            if cur_node is not None and cur_node.is_promoted():
+                local_node = cur_node.next_foreign_neighbor()
+                
+            yield target_dim, local_node
+            
+            if target_dim < end_dim:
+                cur_node = self._follow_bridge(
+                    cur_node, target_dim + 1, x, hop_counts)
+    
+    
+    def _prev_local_node(self, fc_node:FCNode, dimension:int) -> FCNode:
+        """
+        Args:
+            fc_node (FCNode): 
+                Local node of list dimension', or None to denote the position
+                past its tail.
+            
+            dimension (int): Dimension of the list containing fc_node.
+
+        Returns: FCNode: 
+            Nearest local node preceding fc_node, or None if there is none. """
+            
+        prev_node = self._get_fc_list_tail(dimension) if fc_node is None \
+            else fc_node.prev_list_neighbor()
+            
+        if prev_node is not None and prev_node.is_promoted():
+            prev_node = prev_node.prev_foreign_neighbor()
+        return prev_node
+    
+    
+    def _follow_bridge(self, cur_node:FCNode, next_dim:int, x:L,
+                       hop_counts:list[int]=None) -> FCNode:
+        """
+        Given the first node located at or after x in list (next_dim - 1)', find
+        the first node located at or after x in list next_dim'.
+        
+        The bridge of cur_node lands on the variant of a promoted node, which is
+        located at or after x. The promoted node preceding it is located before
+        x, and as every _sampling_ratio-th node is promoted, at most
+        _sampling_ratio - 1 steps back are taken. Without a bridge, the same 
+        holds for the tail of list next_dim'.
+
+        Args:
+            cur_node (FCNode): 
+                First node at or after x in list (next_dim - 1)', or None if 
+                there is none.
+            
+            next_dim (int): Dimension of the list in which to land.
+            
+            x (L): Location for which we are searching.
+            
+            hop_counts (list[int], optional): See fc_matrix_search.
+
+        Returns: FCNode: 
+            First node located at or after x in list next_dim', or None if no 
+            such node exists.   """
+            
+        landing = None if cur_node is None else cur_node.next_dim_bridge()
+        if landing is None:
+            landing = self._get_fc_list_tail(next_dim)
+            if landing is None or landing.loc() < x:
+                if hop_counts is not None: hop_counts.append(0)
+                return None
+        
+        hops = 0
+        while landing.prev_list_neighbor() is not None and \
+            landing.prev_list_neighbor().loc() >= x:
+            landing = landing.prev_list_neighbor()
+            hops += 1
+            
+        if hop_counts is not None: hop_counts.append(hops)
+        return landing
        
             
     def trivial_solution(self, x:int) -> dict[int, tuple[LocationNode, int]]:
@@ -151,154 +411,148 @@ class FCMatrix:
         """
         ret_dict = {}
         for i in range(self._k):
-            x_node, x_index = search_nodes(self._input_data[i], x)
+            if self._search_kernel is None:
+                x_node, x_index = search_nodes(self._input_data[i], x)
+            else:
+                catalog = self._input_data[i]
+                x_index = self._input_kernels[i].lower_bound(x)
+                x_node, x_index = (catalog[x_index], x_index) \
+                    if x_index < len(catalog) and catalog[x_index].loc() == x \
+                        else (None, None)
             
             # Memory issues, this is a stupid amount of space especially when 
             # we're only trying to record function timing
             if self._k < self._n_limit: ret_dict[i + 1] = (x_node, x_index)
         return ret_dict
+
+
+    ############################## Memory Methods ##############################
+    def memory_report(self) -> dict[str, dict[str, int]]:
+        """
+        Walk the augmented lists and report the memory the matrix holds, by
+        category:
+            augmented_nodes -> local FCNodes of the augmented lists.
+            promoted_copies -> FCNodes promoted from the following list.
+            payloads -> LocationNodes of the input lists and their locations.
+            containers -> FCLists, the input and indexed lists, and kernels.
+
+        Returns: dict[str, dict[str, int]]:
+            key -> category, "total" or "estimate", pair -> {"objects": count,
+            "bytes": total} (see Utils.MemoryUtils.MemoryReport). "estimate"
+            holds the FCNode count of the O(kn) bound, where list i' holds
+            list i plus 1/_sampling_ratio of list (i+1)', with the bytes of
+            that many FCNodes plus the payloads.  """
+
+        report = MemoryReport(("augmented_nodes", "promoted_copies",
+                               "payloads", "containers"))
+        node_bytes = 0
+        for fc_list in self._fc_matrix:
+            report.add("containers", fc_list)
+            cur_node = fc_list.head()
+            while cur_node is not None:
+                report.add("augmented_nodes" if cur_node.is_local()
+                           else "promoted_copies", cur_node)
+                node_bytes = getsizeof(cur_node)
+                cur_node = cur_node.next_list_neighbor()
+
+        for catalog in self._input_data:
+            for location_node in catalog:
+                report.add("payloads", location_node)
+                report.add("payloads", location_node.loc())
+
+        for containers in (self._input_data, self._indexed_levels,
+                           self._level_kernels, self._input_kernels):
+            report.add_container("containers", containers)
+
+        memory = report.as_dict()
+        estimated_nodes, level_nodes = 0, 0
+        for catalog in reversed(self._input_data):
+            level_nodes = len(catalog) + level_nodes / self._sampling_ratio
+            estimated_nodes += level_nodes
+        memory["estimate"] = {
+            "objects": round(estimated_nodes),
+            "bytes": round(estimated_nodes * node_bytes) + \
+                memory["payloads"]["bytes"]}
+        return memory
+
+
+    ############################## Update Methods ##############################
+    def replace_catalog(self, dimension:int, nodes:list[LocationNode]) -> None:
+        """
+        Replace the input list of a dimension. Augmented list i' only depends
+        on dimensions i through k, so only lists dimension' through 1' are
+        rebuilt, reusing those of the higher dimensions as they are. Replacing
+        dimension 1 thus costs a single merge, while replacing dimension k 
+        rebuilds every list, the same as a full rebuild.
         
+        Args:
+            dimension (int): Dimension whose input list to replace.
+            
+            nodes (list[LocationNode]): New locations of that dimension. Need
+                not be sorted. The list itself is not modified.
+                
+        Raises: InvalidDimensionalityException: If dimension is invalid.    """
+        
+        if not 1 <= dimension <= self._k:
+            raise InvalidDimensionalityException(dimension, self._k)
+        
+        catalog = list(nodes)
+        sort_LocationNode_list(catalog)
+        self._input_data[dimension - 1] = catalog
+        self._n = max(len(catalog) for catalog in self._input_data)
+        
+        if self._demo:
+            print(f"Rebuilding lists {dimension}' through 1'.")
+        self._build_levels(dimension)
+    
     
     ########################### Matrix Setup Methods ###########################
     def _build_fractional_cascading_matrix(self):
         """
-        1. Convert given nodes into FCNodes prior to promotion/augmentation.
-           Note: this conversion is from an indexed list to a linked list.
+        Walking from the highest dimension to the lowest, merge elements from
+        the augmented list of the prior dimension and elements of the current 
+        dimension into the augmented list of the current dimension.  """
         
-        2. Walking from the highest dimension to the lowest, merge elements from
-           the augmented list of the prior dimension and elements of the current 
-           dimension into the augmented list of the current dimension.  """
+        self._build_levels(self._k)
         
-        if self._demo: 
-            print("Converting input into (not-yet-promoted) FCNodes.")
-
-        # 1. SingleDimNodes -> FCNodes
-        for i in range(self._k):
-            this_FCList = self._fc_matrix[i]
-            for j in range(self._n):
-                this_FCList.append(
-                    FCNode(base_node=self._input_data[i][j], dimension=i+1))
-        
-        # 2. Walk through linked lists in reverse order starting at index k-2
-        # -> (TBC - walking through actual linked lists in order but through 
-        #     list containing linked lists in reverse order.)
-        # -> Always promoting from the previous demension
-        if self._demo: print("Pre-processing FCNodes into matrix.")
-        for i in reversed(range(self._k - 1)):
-            self._fc_matrix[i] = \
-                self._build_augmented_list(self._fc_matrix[i],
-                                           self._fc_matrix[i + 1])
-                
-    
-    def _build_augmented_list(self, node_list_i:FCList, node_list_j:FCList) -> FCList:
+        
+    def _build_levels(self, dimension:int) -> None:
         """
-        Merge all elements in node_list_i and half in node_list_j into a new 
-        FCList to be added to the FrationcalCascadingMatrix.
-
-        Args:
-            node_list_i (FCList): 
-                Represents values from dimension i, all of which will be merged 
-                into the FCList representing the level of the Frationcal 
-                Cascading Matrix being constructed, i' . Must be ordered by the
-                ith dimension.
-            
-            node_list_j (FCList):
-                Represents values from dimension (i - 1)', half of which will be 
-                merged into the FCList representing the level of the Frationcal 
-                Cascading Matrix being constructed, i' .
-                
-        Returns: FCList: 
-            Augmented list i' containing all values from input dimension i and
-            half of the values from dimension (i-1)'    """
-            
-        _last_promoted_node_stack = []  # type: list[FCNode]
-        _last_local_node_stack = []     # type: list[FCNode]
-        def _assign_pointers(cur_node:FCNode) -> None:
-            """
-            Nested method to assign pointers between promoted and local nodes,
-            and vice versa.
-
-            Args: cur_node (FCNode): 
-                FCNode to which we should assign neighbors originally of other 
-                dimensions.  
-            """
-            nonlocal _last_promoted_node_stack
-            nonlocal _last_local_node_stack
-            
-            if cur_node.is_promoted():
-                # Assign prev & next FC neighbors to closest local nodes.
-                _last_promoted_node_stack.append(cur_node)
-                
-                last_local_node = _last_local_node_stack.pop() if \
-                    len(_last_local_node_stack) > 0 else None
-                
-                cur_node.set_prev_f_neighbor(last_local_node)
-                while last_local_node is not None:
-                    # Assign next pointers until _last_local_node_stack is empty.
-                    if last_local_node.next_foreign_neighbor() is None:
-                        last_local_node.set_next_f_neighbor(cur_node)
-                        
-                    last_local_node = _last_local_node_stack.pop() if \
-                        len(_last_local_node_stack) > 0 else None
-                        
-            elif cur_node.is_local():
-                # Assign prev & next FC neighbors to closest promoted nodes.
-                _last_local_node_stack.append(cur_node)
-                
-                last_promoted_node = _last_promoted_node_stack.pop() if \
-                    len(_last_promoted_node_stack) > 0 else None
-                
-                cur_node.set_prev_f_neighbor(last_promoted_node)
-                while last_promoted_node is not None:
-                    # Assign next pointers until _last_promoted_node_stack is empty.
-                    if last_promoted_node.next_foreign_neighbor() is None:
-                        last_promoted_node.set_next_f_neighbor(cur_node)
-                        
-                    last_promoted_node = _last_promoted_node_stack.pop() if \
-                        len(_last_promoted_node_stack) > 0 else None
-            else:
-                raise Exception("Well this shouldn't be happening :/")
+        (Re)build augmented lists dimension' through 1' from _input_data, 
+        reusing the augmented lists of all higher dimensions as they are.
+        Promoted nodes are fresh copies, so those lists are never modified by
+        the lists built from them.
         
-        if self._demo:
-            dim = node_list_i.head().dim()
-            print(f"Promoting nodes from dimension {dim + 1} into {dim}.")
-        
-        # Instantitate FCNode lists to help with promotion.
-        nodes_i_prime = FCList()
-        nodes_to_promote = node_list_j.get_promoted_subset()
-        
-        # Perform transformation
-        list_i_pointer = node_list_i.head()
-        promoting_pointer = nodes_to_promote.head()
-        
-        # -> Merge elements from nodes_to_promote and node_list_i into nodes_i_prime
-        # -> For each FCNode, assign pointers to all relevant foreign/local FCNodes
-        while list_i_pointer is not None and promoting_pointer is not None:
-            if list_i_pointer <= promoting_pointer:
-                nodes_i_prime.append(list_i_pointer)
-                list_i_pointer = list_i_pointer.next_list_neighbor()
-            elif list_i_pointer > promoting_pointer:
-                nodes_i_prime.append(promoting_pointer)
-                promoting_pointer = promoting_pointer.next_list_neighbor()
-            else:
-                raise Exception("Well this shouldn't be happening :/")
-            
-            # _assign_pointers(nodes_i_prime.tail())
+        Args: dimension (int): Highest dimension whose list is (re)built.   """
         
-        # Take leftovers to go.
-        while list_i_pointer is not None:
-            nodes_i_prime.append(list_i_pointer)
-            # _assign_pointers(nodes_i_prime.tail())
-            list_i_pointer = list_i_pointer.next_list_neighbor()
+        if self._demo: print("Pre-processing input into matrix.")
         
-        while promoting_pointer is not None:
-            nodes_i_prime.append(promoting_pointer)
-            # _assign_pointers(nodes_i_prime.tail())        
-            promoting_pointer = promoting_pointer.next_list_neighbor()
-            
-        augmented_pointer = nodes_i_prime.head()
-        while augmented_pointer is not None:
-            _assign_pointers(augmented_pointer)
-            augmented_pointer = augmented_pointer.next_list_neighbor()
-            
-        return nodes_i_prime
\ No newline at end of file
+        # The nodes refer to each other in cycles (see FCNode), so allocating
+        # O(kn) of them would trigger repeated full passes of the cyclic 
+        # garbage collector over the growing matrix.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for i in reversed(range(dimension)):
+                next_level = None
+                if i + 1 < self._k:
+                    next_level = self._indexed_levels[i + 1]
+                    if self._demo:
+                        print(f"Promoting nodes from dimension {i + 2} into " + \
+                            f"{i + 1}.")
+                self._indexed_levels[i] = build_augmented_level(
+                    self._input_data[i], i + 1, next_level, 
+                    self._sampling_ratio)
+                self._fc_matrix[i] = FCList.from_nodes(self._indexed_levels[i])
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        
+        if self._search_kernel is not None:
+            for i in range(dimension):
+                self._level_kernels[i] = make_search_kernel(
+                    self._search_kernel,
+                    [fc_node.loc() for fc_node in self._indexed_levels[i]])
+                self._input_kernels[i] = make_search_kernel(
+                    self._search_kernel,
+                    [loc_node.loc() for loc_node in self._input_data[i]])
@@ -49,12 +49,27 @@ class FCNode:
             
             Nodes in fractional cascading data structures store pointers to the 
             nearest preceding and proceeding nodes in the current dimension with 
-            opposite promotional statuses to the current.   """
+            opposite promotional statuses to the current.
+            
+        _next_dim_bridge (FCNode):
+            Pointer to the _higher_dim_variant of the nearest promoted node at 
+            or after this one in the current dimension's list. Lets a query
+            move into the list of _cur_dim + 1 in a bounded number of steps.
+            None if no promoted node follows this one.
+            
+        _catalog_index (int):
+            If local, the index of _base_node in the sorted input list of its
+            dimension. None for promoted nodes.  """
+    
+    __slots__ = ("_base_node", "_cur_dim", "_higher_dim_variant",
+                 "_l_list_neighbor", "_r_list_neighbor", "_l_f_neighbor",
+                 "_r_f_neighbor", "_next_dim_bridge", "_catalog_index")
  
     def __init__(self, base_node:LocationNode, dimension:int=None,
                  left_list_neighbor:'FCNode'=None,
                  right_list_neighbor:'FCNode'=None,
-                 higher_dim_variant:'FCNode'=None) -> None:
+                 higher_dim_variant:'FCNode'=None,
+                 catalog_index:int=None) -> None:
         if dimension is not None and dimension <= 0:
             raise InvalidInputException(
                 "dimension", str(dimension), "greater than 1", "FCNode")
@@ -69,6 +84,9 @@ class FCNode:
         
         self._l_f_neighbor = None
         self._r_f_neighbor = None
+        
+        self._next_dim_bridge = None
+        self._catalog_index = catalog_index
     
     def dim(self) -> int:
         """
@@ -120,6 +138,21 @@ class FCNode:
     
     def set_next_f_neighbor(self, right_foreign_neighbor:'FCNode') -> None:
         self._r_f_neighbor = right_foreign_neighbor
+        
+    def next_dim_bridge(self) -> 'FCNode':
+        """
+        Returns: FCNode: the FCNode in the list of the following dimension from
+        which the nearest promoted node at or after this one was promoted. """
+        return self._next_dim_bridge
+    
+    def set_next_dim_bridge(self, bridge:'FCNode') -> None:
+        self._next_dim_bridge = bridge
+    
+    def catalog_index(self) -> int:
+        """
+        Returns: int: Index of the base node in the sorted input list of its
+        dimension, or None if this FCNode is promoted.   """
+        return self._catalog_index
     
     def copy(self) -> 'FCNode':
         """
@@ -129,7 +162,8 @@ class FCNode:
             base_node=self._base_node, dimension=self._cur_dim,
             left_list_neighbor=self._l_list_neighbor,
             right_list_neighbor=self._r_list_neighbor, 
-            higher_dim_variant=self._higher_dim_variant)
+            higher_dim_variant=self._higher_dim_variant,
+            catalog_index=self._catalog_index)
         
     def promote(self) -> 'FCNode':
         """
@@ -263,21 +297,37 @@ class FCList:
             self._list_tail = fc_node
         self._n += 1
     
-    def get_promoted_subset(self) -> 'FCList':
+    @classmethod
+    def from_nodes(cls, fc_nodes:list[FCNode]) -> 'FCList':
+        """
+        Args: fc_nodes (list[FCNode]): 
+            Nodes already linked to one another through their list neighbors,
+            in order.
+        
+        Returns: FCList: FCList whose linked list is fc_nodes.  """
+        fc_list = cls()
+        if len(fc_nodes) > 0:
+            fc_list._list_head, fc_list._list_tail = fc_nodes[0], fc_nodes[-1]
+            fc_list._n = len(fc_nodes)
+        return fc_list
+    
+    def get_promoted_subset(self, step:int=2) -> 'FCList':
         """
+        Args: step (int): Promote every step-th element, starting at the head.
+            Defaults to every second element.
+        
         Returns: FCList: 
-            FCList containing every second element of this one, relative
+            FCList containing every step-th element of this one, relative
             ordering maintained.    """
-        add_node = True
+        countdown = 0
         subset = FCList()
         subset_pointer = self._list_head
         
         while(subset_pointer is not None):
-            if add_node:
+            if countdown == 0:
                 subset.append(subset_pointer.promote())
-                add_node = False
-            else:
-                add_node = True
+                countdown = step
+            countdown -= 1
                 
             subset_pointer = subset_pointer.next_list_neighbor()
         
@@ -297,4 +347,91 @@ class FCList:
         return pretty_list(self.to_list())
     
     def __repr__(self) -> str:
-        return str(self)
\ No newline at end of file
+        return str(self)
+
+
+def build_augmented_level(local_nodes:list[LocationNode], dimension:int,
+                          next_level:list[FCNode]=None,
+                          sampling_ratio:int=2) -> list[FCNode]:
+    """
+    Build augmented list dimension' of a fractional cascading matrix in a
+    single sweep. Every FCNode of the list is allocated up front, after which
+    each position is filled in merge order, either from the next local node or
+    by promoting the next sampled node of next_level. Foreign neighbors and
+    bridges are wired in the same sweep: nodes still waiting on one always
+    form a contiguous run of positions ending at the current one, so each is
+    assigned once, when the node resolving it is placed.
+
+    Args:
+        local_nodes (list[LocationNode]): 
+            Sorted input list of dimension, each becoming a local node.
+        
+        dimension (int): Dimension of the list being built.
+        
+        next_level (list[FCNode], optional):
+            Augmented list (dimension + 1)', every sampling_ratio-th node of 
+            which is promoted into this one, starting at its head. None for
+            the list of the last dimension.
+        
+        sampling_ratio (int): See FCMatrix. Defaults to 2.
+
+    Returns: list[FCNode]: 
+        The nodes of the list, in order and linked through their list
+        neighbors. Ties are broken in favour of local nodes.  """
+    
+    promoted = [] if next_level is None else next_level[::sampling_ratio]
+    local_locs = [loc_node.loc() for loc_node in local_nodes]
+    promoted_locs = list(map(FCNode.loc, promoted))
+    n_local, n_promoted = len(local_nodes), len(promoted)
+    m = n_local + n_promoted
+    
+    new = FCNode.__new__
+    fc_nodes = [new(FCNode) for _ in range(m)]
+    
+    a = b = 0   # Cursors into local_nodes and promoted respectively.
+    prev_node = last_local = last_promoted = None   # type: FCNode
+    # First position of the current run of same-status nodes, which are still
+    # missing a next foreign neighbor, and first position missing a bridge.
+    run_start, run_promoted, unbridged = 0, False, 0
+    for j in range(m):
+        fc_node = fc_nodes[j]
+        is_promoted = not (b == n_promoted or \
+            (a < n_local and local_locs[a] <= promoted_locs[b]))
+        
+        if not is_promoted:
+            fc_node._base_node = local_nodes[a]
+            fc_node._higher_dim_variant = None
+            fc_node._catalog_index = a
+            fc_node._l_f_neighbor = last_promoted
+            fc_node._next_dim_bridge = None
+            last_local = fc_node
+            a += 1
+        else:
+            source = promoted[b]
+            fc_node._base_node = source._base_node
+            fc_node._higher_dim_variant = source
+            fc_node._catalog_index = None
+            fc_node._l_f_neighbor = last_local
+            last_promoted = fc_node
+            b += 1
+            
+            # Every position since the last promoted node bridges here.
+            for p in range(unbridged, j + 1):
+                fc_nodes[p]._next_dim_bridge = source
+            unbridged = j + 1
+        
+        fc_node._cur_dim = dimension
+        fc_node._r_f_neighbor = None
+        fc_node._l_list_neighbor = prev_node
+        if prev_node is not None:
+            prev_node._r_list_neighbor = fc_node
+        prev_node = fc_node
+        
+        if is_promoted != run_promoted:
+            for p in range(run_start, j):
+                fc_nodes[p]._r_f_neighbor = fc_node
+            run_start, run_promoted = j, is_promoted
+    
+    if prev_node is not None:
+        prev_node._r_list_neighbor = None
+    return fc_nodes
@@ -0,0 +1,109 @@
+from typing import Sequence
+
+from Utils.CustomExceptions import InvalidTypeException
+from Utils.TypeUtils import L
+
+# NumPy is optional. Without it, FCArrayMatrix keeps to its pure Python path.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def numpy_available() -> bool:
+    """
+    Returns: bool: True if NumPy can be imported.   """
+    return np is not None
+
+
+class FCNumpyKernel:
+    """
+    Export of the augmented levels of an FCArrayMatrix into NumPy arrays, st. a
+    whole batch of queries is pushed through all k levels by vectorized
+    searchsorted and gather operations rather than a per-query Python loop.
+
+    Fields:
+        _k (int): dimensionality
+
+        _step (int):
+            One more than the most steps back taken after following a bridge,
+            ie. the promotion step of the levels unless they were patched
+            since (see FCArrayMatrix.insert).
+
+        _keys (list[np.ndarray]):
+            _keys[i] -> locations of augmented level (i+1)'. Must be numeric.
+
+        _bridge (list[np.ndarray]), _local (list[np.ndarray]):
+            Zero-copy views of the bridge and local index arrays of the matrix
+            (see FCArrayMatrix). The last bridge is None. """
+
+    def __init__(self, keys:list[Sequence[L]], bridge:list[Sequence[int]],
+                 local:list[Sequence[int]], step:int=2) -> None:
+        """
+        Args:
+            keys, bridge, local (list[Sequence]):
+                Levels of an FCArrayMatrix, as described in its Fields.
+
+            step (int): See Fields.
+
+        Raises: InvalidTypeException: If the locations are not numeric. """
+
+        if np is None:
+            raise ImportError("FCNumpyKernel requires NumPy.")
+
+        self._k = len(keys)
+        self._step = step
+        self._keys = [np.asarray(level_keys) for level_keys in keys]
+        for level_keys in self._keys:
+            if len(level_keys) > 0 and level_keys.dtype.kind not in "iuf":
+                raise InvalidTypeException(
+                    level_keys.dtype, "numeric locations", "FCNumpyKernel")
+
+        self._bridge = [None if b is None else _as_ndarray(b) for b in bridge]
+        self._local = [_as_ndarray(l) for l in local]
+
+
+    def search_many(self, xs:Sequence[L]) -> 'np.ndarray':
+        """
+        Batched successor search. Unlike FCArrayMatrix.fc_matrix_search_many,
+        queries need not be sorted as every level is handled by a gather.
+
+        Args:
+            xs (Sequence[L]): Locations for which to search.
+
+        Returns: np.ndarray:
+            (len(xs) x k) matrix of int64 indices. The entry at [q, d - 1] is
+            the index in the input list of dimension d of xs[q] or its
+            successor. Equal to n if there is no successor.   """
+
+        xs = np.asarray(xs)
+        ranks = np.empty((len(xs), self._k), dtype=np.int64)
+
+        j = np.searchsorted(self._keys[0], xs, side='left')
+        for i in range(self._k):
+            ranks[:, i] = self._local[i][j]
+            if i + 1 == self._k:
+                break
+
+            j = self._bridge[i][j].astype(np.int64)
+            next_keys = self._keys[i + 1]
+            if len(next_keys) == 0:
+                continue
+
+            # Step back where the entry preceding the bridge is still >= x.
+            for _ in range(self._step - 1):
+                back = (j > 0) & (next_keys[np.maximum(j - 1, 0)] >= xs)
+                j -= back
+
+        return ranks
+
+
+def _as_ndarray(index_array:Sequence[int]) -> 'np.ndarray':
+    """
+    Returns: np.ndarray:
+        View sharing the buffer of an array.array of indices, or a converted
+        copy of any other sequence.  """
+    typecode = getattr(index_array, "typecode", None)
+    if typecode is not None:
+        return np.frombuffer(index_array, dtype=np.dtype(typecode))
+    return np.asarray(index_array, dtype=np.int64)
@@ -8,7 +8,8 @@ class DataNode:
     
     Fields:
         _data (D): Arbitrary piece of information stored in this node.  """
-        
+    
+    __slots__ = ("_data",)
     
     def __init__(self, data:D) -> None:
         self._data = data
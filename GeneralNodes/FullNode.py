@@ -22,6 +22,8 @@ class FullNode:
         _dimensionality (int): Represents number of location values in which
             this FullNode exists.   """
     
+    __slots__ = ("_data", "_locs", "_dimensionality")
+    
     def __init__(self, data:DataNode, locations:dict[int, LocationNode]) -> None:
         """
         Args:
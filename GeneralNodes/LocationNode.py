@@ -19,6 +19,8 @@ class LocationNode:
             A string further representing the dimension for cases in which it is 
             indicative of something other than a number. (Only used for printing
             purposes.)  """
+    
+    __slots__ = ("_loc", "_dim", "_dim_label")
             
     def __init__(self, location:L, dimension:int, 
                  dimension_label:Optional[str]=None) -> None:
@@ -61,6 +63,12 @@ class LocationNode:
             this LocationNode refers.   """
         return self._dim
     
+    def dim_label(self) -> Optional[str]:
+        """
+        Returns: Optional[str]: The dimension label of this LocationNode, or
+            None if it has none.    """
+        return self._dim_label
+    
     def dim_str(self) -> str:
         """
         Returns: str: _dim_label if the field exists, else the dimension integer
@@ -135,4 +135,36 @@ def generate_FullNode_data_set(
             loc_dict[j] = LocationNode(node_data_matrix[j][i], j, d_label)
         node_list.append(FullNode(DataNode(node_data_matrix[0][i]), loc_dict))
                 
-    return node_list
\ No newline at end of file
+    return node_list
+
+def columns_to_FullNode_list(columns:list[list[int]],
+                             xyz_label:bool=True) -> list[FullNode]:
+    """
+    Build a list of FullNodes from explicitly given location values, such that
+    specific (ie. adversarial) layouts can be constructed.
+
+    Args:
+        columns (list[list[int]]):
+            One list of n location values per dimension. The ith FullNode is
+            located at columns[d - 1][i] in dimension d.
+        
+        xyz_label (bool):
+            If true and dimensionality is less than or equal to 3, then label 
+            dimension 1 as  'x', dimension 2 as 'y', dimension 3 as 'z' (given
+            that they exist).
+
+    Returns: list[FullNode]:
+        List of n FullNode objects, the ith of which holds data value i. """
+
+    xyz_dict = {1:'x', 2: 'y', 3: 'z'}
+    dim = len(columns)
+    
+    node_list = []
+    for i in range(len(columns[0])):
+        loc_dict = {}
+        for j in range(1, dim + 1):
+            d_label = xyz_dict[j] if dim <= 3 and xyz_label else None
+            loc_dict[j] = LocationNode(columns[j - 1][i], j, d_label)
+        node_list.append(FullNode(DataNode(i), loc_dict))
+    
+    return node_list
@@ -1,12 +1,13 @@
-from typing import Union
+from typing import Sequence, Union
 from FractionalCascading.FCNodeStructures import FCNode
 
 from GeneralNodes.FullNode import FullNode
 from GeneralNodes.LocationNode import LocationNode
 from GeneralNodes.SingleDimNode import SingleDimNode
+from Utils.SearchKernels import SearchKernel, make_search_kernel
 from Utils.TypeUtils import L
 from Utils.CustomExceptions import InvalidDimensionalityException, \
-    InvalidInputException, InvalidTypeException, MissingParameterException, \
+    InvalidTypeException, MissingParameterException, \
         raise_if_not_expected_types
 
 ################## Utils for data structures containing nodes ##################
@@ -63,9 +64,9 @@ def _binary_search(nodes:list[Union[LocationNode, FCNode]],
         nodes (list[Union[LocationNode, FCNode]]): 
             sorted list of location nodes or FCNodes in which to search.
         
-        l (int): leftmost list index in current recursive call.
+        l (int): leftmost list index of the search.
         
-        r (int): rightmost list index in current recursive call.
+        r (int): rightmost list index of the search.
         
         x (L): locaton type value for which we are searching.
 
@@ -75,210 +76,185 @@ def _binary_search(nodes:list[Union[LocationNode, FCNode]],
         
         Or (None, None) should the value not exist in the list. """
     
-    if r < l: return (None, None)
-
-    m = l + (r - l) // 2
-    
-    if nodes[m].loc() == x:
-        return (nodes[m], m)
+    # Iterative, reading each probed location once.
+    while l <= r:
+        m = l + (r - l) // 2
+        m_loc = nodes[m].loc()
+        
+        if m_loc == x:
+            return (nodes[m], m)
+        elif m_loc > x:
+            r = m - 1
+        else:
+            l = m + 1
     
-    elif nodes[m].loc() > x:
-        return _binary_search(nodes, l, m-1, x)
+    return (None, None)
 
-    else:
-        return _binary_search(nodes, m + 1, r, x)
+def successor_search_nodes(
+    nodes:list[Union[LocationNode, FCNode]],
+    search_val:L) -> tuple[Union[LocationNode, FCNode], int]:
+    """
+    Binary search for the leftmost node in a sorted list whose location is
+    greater than or equal to search_val.
+
+    Args:
+        nodes (list[Union[LocationNode, FCNode]]):
+            sorted list of location nodes or FCNodes in which to search.
 
-############################## Merge Sort Methods ##############################
-# Functions to perform an in-place merge sort on a list of SingleDimNodes. The
-# resulting state of the list is in ascending order based on the values of the
-# LocationNode in each SingleDimNode.
+        search_val (L): locaton type value for which we are searching.
 
-def _merge_matrices(matrix: list[list[SingleDimNode]],
-                    l:int, m:int, r:int, dim:int=None) -> None:
+    Returns: tuple[Union[LocationNode, FCNode], int]:
+        The successor of search_val (or the node at search_val) and its index.
+        (None, len(nodes)) should every location be less than search_val.   """
+
+    l, r = 0, len(nodes)
+    while l < r:
+        m = l + (r - l) // 2
+        if nodes[m].loc() < search_val:
+            l = m + 1
+        else:
+            r = m
+
+    return (nodes[l], l) if l < len(nodes) else (None, l)
+
+def search_tree_leaves(
+    cur_root:'RangeTreeNode', target:L, search_kernel:str,
+    leaf_indices:dict[int, tuple[list['RangeTreeNode'], SearchKernel]],
+    predecessor:bool=False) -> 'RangeTreeNode':
     """
-    Merge function for merge sort. Compare the LocationNode objects in each
-    SingleDimNode of dimension dim.
+    Find the leaf RangeTree._query (or LayeredRangeTree._query) would land on
+    from the root of the tree of a dimension, by searching a kernel over its 
+    leaves instead of descending it.
 
     Args:
-        matrix (list[list[SingleDimNode]]):
-            Matrix of SingleDimNodes with each second-dimension list 
-            representing a given dimension.
-            
-        l (int): Leftmost index of the subset in this recursive call.
+        cur_root (RangeTreeNode): 
+            Root of the tree of a whole dimension, of either a RangeTree or a
+            LayeredRangeTree.
         
-        m (int): Middle index of the subset in this recursive call.
+        target (L): Location for which we are searching.
         
-        r (int): Rightmost index of the subset in this recursive call.    
+        search_kernel (str): Name of the SearchKernel to search the leaves with.
         
-        d (int, optional):
-            If not None, treat arr as list of FullNode instances to be sorted on 
-            this field. Otherwise treat arr as list of SingleDimNodes.  """
-            
-    n_dims = len(matrix)    # Number of dimensions.
-    
-    # Sizes of two second-dimensional subarrays to be merged
-    n1, n2 = m - l + 1, r - m
-
-    # Temp arrays
-    l_subset = [[matrix[d][l + i] for i in range(n1)] for d in range(n_dims)]
-    r_subset = [[matrix[d][m + 1 + j] for j in range(n2)] for d in range(n_dims)]
+        leaf_indices (dict[int, tuple[list[RangeTreeNode], SearchKernel]]):
+            By dimension, the leaves of the tree of that dimension with a kernel
+            over their locations. The entry of the dimension of cur_root is 
+            added on first use.
         
-    # Merge temp arrays
-    i = j = 0
-    k = l
+        predecessor (bool): As in _query.
+
+    Returns: RangeTreeNode: 
+        The leaf at target, or at its successor (or predecessor). The last (or
+        first) leaf if there is none.   """
     
-    while i < n1 and j < n2:
-        if (l_subset[dim - 1][i].locationNode() <= r_subset[dim - 1][j].locationNode()):
-            for d in range(n_dims): matrix[d][k] = l_subset[d][i]
-            i += 1
-        else:
-            for d in range(n_dims): matrix[d][k] = r_subset[d][j]
-            j += 1
-        k += 1
+    dimension = cur_root.dimension()
+    if dimension not in leaf_indices:
+        leaves = cur_root.get_leaves()
+        leaf_indices[dimension] = (leaves, make_search_kernel(
+            search_kernel, [leaf.get_location() for leaf in leaves]))
+    leaves, kernel = leaf_indices[dimension]
     
-    # Copy remaining elements of left_matrix or right_matrix if any
-    while i < n1:
-        for d in range(n_dims): matrix[d][k] = l_subset[d][i]
-        k += 1
-        i += 1
-        
-    while j < n2:
-        for d in range(n_dims): matrix[d][k] = r_subset[d][j]
-        k += 1
-        j += 1
+    # Like _query, fall back to the first or last leaf if there is no 
+    # predecessor or successor.
+    if predecessor:
+        return leaves[max(kernel.upper_bound(target) - 1, 0)]
+    return leaves[min(kernel.lower_bound(target), len(leaves) - 1)]
 
+################################ Sort Methods ##################################
+# Every sort below extracts one plain key per node (a location or data value)
+# up front and lets the built-in sort order the keys, st. nodes are never
+# compared through their rich comparison methods. Built-in sorting is stable,
+# as was the merge sort it replaces: nodes with equal keys keep their order.
 
-def _merge_lists(
-    arr:Union[list[SingleDimNode], list[LocationNode], list[FullNode]], 
-    l:int, m:int, r:int, mode:int, dim:int=None, on_data:bool=False) -> None:
+def node_sort_keys(
+    nodes:Sequence[Union[LocationNode, SingleDimNode, FullNode, FCNode]],
+    dimension:int=None, on_data:bool=False) -> list:
     """
-    Merge function for merge sort. Compare the LocationNode objects in each
-    SingleDimNode or the LocationNode objects in each FullNode at dimension dim.
-
     Args:
-        arr (Union[list[SingleDimNode], list[FullNode]]):
-            List of SingleDimNodes to be sorted on their location or list of
-            FullNodes to be sorted on a given dimension.
-        
-        l (int): Leftmost index of the subset in this recursive call.
-        
-        m (int): Middle index of the subset in this recursive call.
-        
-        r (int): Rightmost index of the subset in this recursive call.
+        nodes (Sequence[Union[LocationNode, SingleDimNode, FullNode, FCNode]]):
+            Nodes all of the same type.
         
-        mode (int): Correlates with one of the three types expected by arr.
-            1 -> list[SingleDimNode] and list[LocationNode]
-            2 -> list[FullNode]]
+        dimension (int, optional): 
+            Dimension of the locations of FullNodes. Required for FullNodes 
+            unless on_data, ignored otherwise.
             
-        dim (int, optional):
-            If not None, treat arr as list of FullNode instances to be sorted on 
-            this field. Otherwise treat arr as list of SingleDimNodes.  """
-
-    if mode == 2 and dim is None:
-        raise MissingParameterException(
-            "_merge_lists", "dim", "Dimensionality parameter can only be " + \
-                "left None if parameter mode == 1 (meaning that arr is a " + \
-                    "list of SingleDimNodes).")
-    
-    # Sizes of two subarrays to be merged
-    n1, n2 = m - l + 1, r - m
+        on_data (bool): 
+            If true, the keys are the data values of SingleDimNodes or 
+            FullNodes. Otherwise, their locations (default).
+            
+    Raises: MissingParameterException: 
+        If nodes are FullNodes sorted on location without a dimension.
     
-    # Temp arrays
-    left_arr = [arr[l + i] for i in range(n1)]
-    right_arr = [arr[m + 1 + j] for j in range(n2)]
+    Returns: list: The sort key of each node, in the order of nodes.    """
     
-    # Merge temp arrays
-    i = j = 0
-    k = l
+    if len(nodes) == 0:
+        return []
     
-    while i < n1 and j < n2:
-        
-        # Compare based on input:
-        # -> Get comparison weights
-        if on_data:
-            left_weight, right_weight = \
-                left_arr[i].data(), right_arr[j].data()
-        elif mode == 1:
-            left_weight, right_weight = \
-                left_arr[i].locationNode(), right_arr[j].locationNode()
-        else:
-            left_weight, right_weight = \
-                left_arr[i].loc(dim), right_arr[j].loc(dim)
-            
-        # -> Compare comparison weights
-        if (left_weight <= right_weight):
-            arr[k] = left_arr[i]
-            i += 1
-        else:
-            arr[k] = right_arr[j]
-            j += 1
-        k += 1
+    if on_data:
+        return [node.data() for node in nodes]
+    if isinstance(nodes[0], FullNode):
+        if dimension is None:
+            raise MissingParameterException(
+                "node_sort_keys", "dimension", "FullNodes can only be " + \
+                    "sorted on location in a given dimension.")
+        return [node.loc(dimension).loc() for node in nodes]
+    return [node.loc() for node in nodes]
+
+
+def argsort_keys(keys:Sequence) -> list[int]:
+    """
+    Returns: list[int]: 
+        Permutation of the indices of keys, st. keys[order[0]], keys[order[1]],
+        ... is in non-decreasing order. Indices of equal keys stay in order.  
+    """
+    return sorted(range(len(keys)), key=keys.__getitem__)
+
+
+def presort_dimensions(
+    locations:list[Sequence[L]]) -> tuple[list[list[int]], list[list[int]]]:
+    """
+    Sort the points of a data set once in every dimension, as done up front 
+    when building a range tree.
     
-    # Copy remaining elements of left_arr or right_arr if any
-    while i < n1:
-        arr[k] = left_arr[i]
-        k += 1
-        i += 1
+    Args: locations (list[Sequence[L]]): 
+        locations[d][i] -> location of point i in dimension d + 1.
         
-    while j < n2:
-        arr[k] = right_arr[j]
-        k += 1
-        j += 1
+    Returns: tuple[list[list[int]], list[list[int]]]:
+        orders, ranks, where orders[d][r] -> index of the point of rank r in 
+        dimension d + 1, and ranks[d] is its inverse. Ties are broken on the 
+        following dimensions, then on the index of the point.  """
     
+    k = len(locations)
+    n = len(locations[0]) if k > 0 else 0
+    orders, ranks = [], []  # type: list[list[int]], list[list[int]]
+    for d in range(k):
+        keys = locations[d] if d + 1 == k else list(zip(*locations[d:]))
+        orders.append(argsort_keys(keys))
+        ranks.append([0] * n)
+        for r, i in enumerate(orders[d]):
+            ranks[d][i] = r
+    return orders, ranks
 
-def _merge_sort(arr:list[
-    Union[SingleDimNode, FullNode, list[SingleDimNode], LocationNode]],
-    l:int, r:int, mode:int=None, dim:int=None, on_data:bool=False) -> None:
+
+def permute_in_place(arr:list, order:Sequence[int]) -> None:
     """
-    In-place recursive merge sort.
+    Reorder arr in place, st. arr[i] becomes the old arr[order[i]].
     
     Args:
-        arr (Union[list[SingleDimNode], list[FullNode], list[list[SingleDimNode]]):
-            List of SingleDimNodes to be sorted on their location, list of
-            FullNodes to be sorted on a given dimension, or a Matrix of
-            SingleDimNodes to be sorted on a given dimension.
-        
-        l (int): Leftmost index of the subset in this recursive call.
-        
-        r (int): Rightmost index of the subset in this recursive call.
-        
-        mode (int): Correlates with one of the three types expected by arr.
-            1 -> list[SingleDimNode]
-            2 -> list[FullNode]
-            3 -> list[list[SingleDimNode]]
-            4 -> list[LocationNode]
+        arr (list): List to reorder.
         
-        dim (int, optional):
-            If not None, treat arr as list of FullNode instances to be sorted on 
-            this field. Otherwise treat arr as list of SingleDimNodes.
-            
-        on_data (bool): 
-            If true, sort using the data values of the FullNodes. Otherwise, use 
-            location (default). """
-            
-    if not 1 <= mode <= 3:
-        raise InvalidInputException(
-            "mode", mode, "between 1 and 3 (inclusive)", "_merge_sort")
-    
-    if dim != None: # Ensure that arr is a list of FullNodes
-        raise_if_not_expected_types(
-            obj=arr[0], expected_type=FullNode, exception=InvalidTypeException, 
-            params=[type(arr[0]), FullNode, "_merge_sort"])
-
-    if l < r:
-        m = l + (r - l) // 2
-        _merge_sort(arr, l, m, mode, dim, on_data)
-        _merge_sort(arr, m + 1, r, mode, dim, on_data)
+        order (Sequence[int]): Permutation of the indices of arr. """
+    arr[:] = [arr[i] for i in order]
 
-        if mode == 1 or mode == 2:
-            _merge_lists(arr, l, m, r, mode, dim, on_data)
-        else:
-            _merge_matrices(arr, l, m, r, dim)
-            
 
 def sort_LocationNode_list(unsorted_arr:list[LocationNode]) -> None:
+    """
+    Sort a list of LocationNodes in place by their location values.
+    
+    Args: unsorted_arr (list[LocationNode]): List of LocationNodes to sort.  """
+    
     if len(unsorted_arr) > 1:
-        _merge_sort(unsorted_arr, 0, len(unsorted_arr) - 1, 1)
+        keys = node_sort_keys(unsorted_arr)
+        permute_in_place(unsorted_arr, argsort_keys(keys))
       
             
 def sort_SingleDimNode_list(unsorted_arr:list[SingleDimNode], on_data:bool=False) -> None:
@@ -293,7 +269,8 @@ def sort_SingleDimNode_list(unsorted_arr:list[SingleDimNode], on_data:bool=False
             location (default). """
     
     if len(unsorted_arr) > 1:
-        _merge_sort(unsorted_arr, 0, len(unsorted_arr) - 1, 1, on_data=on_data)      
+        keys = node_sort_keys(unsorted_arr, on_data=on_data)
+        permute_in_place(unsorted_arr, argsort_keys(keys))
 
 
 def sort_FullNode_list(unsorted_arr:list[FullNode], dimension:int=-1, on_data:bool=False) -> None:
@@ -306,22 +283,33 @@ def sort_FullNode_list(unsorted_arr:list[FullNode], dimension:int=-1, on_data:bo
         dimension (int): The dimension on which to sort unsorted_arr.
         
         on_data (bool): 
-            If true, sort using the data values of the FullNodes. Otherwise, use
-            location (default). """
+            If true, sort using the data values of the FullNodes. Otherwise, use 
+            location (default). 
+            
+    Raises:
+        InvalidDimensionalityException: If dimension is invalid.
+        
+        InvalidTypeException: If unsorted_arr does not hold FullNodes.  """
         
     if len(unsorted_arr) > 1:
         if not 0 < dimension <= unsorted_arr[0].dimensionality():
             raise InvalidDimensionalityException(
                 dimension, unsorted_arr[0].dimensionality())
+        raise_if_not_expected_types(
+            obj=unsorted_arr[0], expected_type=FullNode, 
+            exception=InvalidTypeException, 
+            params=[type(unsorted_arr[0]), FullNode, "sort_FullNode_list"])
         
-        _merge_sort(unsorted_arr, 0, len(unsorted_arr) - 1, 2, dimension, on_data)
+        keys = node_sort_keys(unsorted_arr, dimension, on_data)
+        permute_in_place(unsorted_arr, argsort_keys(keys))
         
 
 def sort_SingleDimNode_matrix(
     unsorted_matrix:list[list[SingleDimNode]], dimension:int) -> None:
     """
     Sort a matrix of SingleDimNodes in place by their LocationNode values in a 
-    given dimension.
+    given dimension. The permutation sorting that dimension's row is applied 
+    to every row, st. each column keeps the nodes of one point.
     
     Args:
         unsorted_matrix (list[list[SingleDimNode]]): 
@@ -333,5 +321,6 @@ def sort_SingleDimNode_matrix(
         raise InvalidDimensionalityException(dimension, len(unsorted_matrix))
     
     if len(unsorted_matrix) >= 1 and len(unsorted_matrix[0]) > 1:
-        _merge_sort(unsorted_matrix, 0, len(unsorted_matrix[0]) - 1, 3, dimension)
-  
\ No newline at end of file
+        order = argsort_keys(node_sort_keys(unsorted_matrix[dimension - 1]))
+        for row in unsorted_matrix:
+            permute_in_place(row, order)
@@ -5,6 +5,8 @@ from Utils.TypeUtils import D, L
 
 class SingleDimNode:
     
+    __slots__ = ("_data", "_loc")
+    
     def __init__(self, data:DataNode, location:LocationNode) -> None:
         self._data = data
         self._loc = location
@@ -1,12 +1,15 @@
 from GeneralNodes.DataNode import DataNode
 from GeneralNodes.FullNode import FullNode
 from GeneralNodes.NodeUtils import fullNode_list_to_SingleDimNode_matrix, \
-    sort_SingleDimNode_list, sort_SingleDimNode_matrix
+    search_tree_leaves, sort_SingleDimNode_list, sort_SingleDimNode_matrix
 from GeneralNodes.SingleDimNode import SingleDimNode
 from LayeredRangeTree.LayeredRangeTreeNode import LayeredRangeTreeNode, \
     RangeTreeNode, LayeredRangeTreeSubNode
-from Utils.CustomExceptions import InvalidDimensionalityException
-from Utils.GeneralUtils import matrix_col_subset
+from Utils.CustomExceptions import InvalidDimensionalityException, \
+    InvalidInputException
+from Utils.GeneralUtils import check_range_bounds, matrix_col_subset
+from Utils.MemoryUtils import range_tree_memory_report
+from Utils.SearchKernels import SEARCH_KERNELS, SearchKernel
 from Utils.TypeUtils import L
 
 LEFT, RIGHT = 0, 1
@@ -25,15 +28,29 @@ class LayeredRangeTree:
         _dimensionality (int): 
             Dimensionality of the data set represented by this Range Tree.
         
-        _root (RangeTreeNode): the root node of the Range Tree. """
+        _root (RangeTreeNode): the root node of the Range Tree. 
+        
+        _search_kernel (str): 
+            Name of the SearchKernel (see Utils.SearchKernels) used by 
+            query_range_tree in place of descending the tree. None (default) 
+            to descend the tree.
+        
+        _leaf_indices (dict[int, tuple[list[RangeTreeNode], SearchKernel]]):
+            By dimension, the leaves of the tree of that dimension searched by 
+            query_range_tree, with a kernel over their locations. Built on 
+            first use.  """
     
-    def __init__(self, data_set:list[FullNode], dimensionality:int) -> None:
+    def __init__(self, data_set:list[FullNode], dimensionality:int,
+                 search_kernel:str=None) -> None:
         """
         Args:
             data_set (list[FullNode]): 
                 List of FullNode instances to be preprocessed into Range Tree.
             
-            dimensionality (int): The Dimensionality of data_set. """
+            dimensionality (int): The Dimensionality of data_set. 
+            
+            search_kernel (str, optional): 
+                Name of a SearchKernel for query_range_tree. See Fields. """
         
         if len(data_set) == 0:
             raise Exception("data_set is empty. Cannot construct RangeTree.")
@@ -41,7 +58,14 @@ class LayeredRangeTree:
             raise Exception(f"dimensionality value ({dimensionality}) must " + \
                 "be greater than 1.")
         
+        if search_kernel is not None and search_kernel not in SEARCH_KERNELS:
+            raise InvalidInputException("search_kernel", str(search_kernel),
+                                        f"one of {list(SEARCH_KERNELS)}",
+                                        "LayeredRangeTree")
+        
         self._dimensionality = dimensionality
+        self._search_kernel = search_kernel
+        self._leaf_indices = {} # type: dict[int, tuple[list[RangeTreeNode], SearchKernel]]
         converted_data_set = fullNode_list_to_SingleDimNode_matrix(data_set)
         
         # Build Layered Range Tree with all but the final dimension.
@@ -179,18 +203,26 @@ class LayeredRangeTree:
                 
         def handle_left() -> RangeTreeNode:
             if path != None: path.append((LEFT, cur_root))
-            return self._query(target, cur_root.left_child(), path)
+            return self._query(target, cur_root.left_child(), path, predecessor)
         
         def handle_right() -> RangeTreeNode:
             if path != None: path.append((RIGHT, cur_root))
-            return self._query(target, cur_root.right_child(), path)
+            return self._query(target, cur_root.right_child(), path, predecessor)
         
         if cur_root.is_leaf():
             if path != None: path.append((-1, cur_root))
             return cur_root
         elif predecessor:
-            return handle_right() \
-                if target >= cur_root.get_location() else handle_left()
+            if target < cur_root.get_location():
+                return handle_left()
+            leaf = handle_right()
+            if leaf.get_location() > target:
+                # Nothing on the right is at or before target, so its 
+                # predecessor is the last leaf on the left, at this location.
+                leaf = cur_root.left_child()
+                while not leaf.is_leaf():
+                    leaf = leaf.right_child()
+            return leaf
         else:
             return handle_left() \
                 if target <= cur_root.get_location() else handle_right()
@@ -229,7 +261,11 @@ class LayeredRangeTree:
         while cur_root.dimension() < search_dimension:
             cur_root = cur_root.next_dimension_subtree()
         
-        ret_node = self._query(target, cur_root, predecessor=predecessor)
+        if self._search_kernel is None:
+            ret_node = self._query(target, cur_root, predecessor=predecessor)
+        else:
+            ret_node = search_tree_leaves(cur_root, target, self._search_kernel,
+                                          self._leaf_indices, predecessor)
                 
         if print_result:
             print(f"Search result for {str(target)}:\n" + \
@@ -381,18 +417,15 @@ class LayeredRangeTree:
             sort_on_data_after_query (bool, optional): 
                 If true (default), sort results of search on their data fields.
                 
+        Raises: InvalidInputException: 
+            Unless range_mins & range_maxes contain bounds for each dimension.
+                
         Returns: list[DataNode]: 
             List of DataNode instances located between the locations specified 
             in range_mins and range_maxes.  """
         
-        if len(range_mins) != len(range_maxes):
-            raise Exception("orthogonal_range_search method parameters " + \
-                "range_mins and range_maxes must be of equal length.")
-        
-        if len(range_mins) < self._dimensionality:
-            raise Exception("orthogonal_range_search method parameters " + \
-                "range_mins and range_maxes must be of length greater than " + \
-                    "or equal to the dimensionality of this Range Tree.")
+        check_range_bounds(range_mins, range_maxes, self._dimensionality,
+                           "LayeredRangeTree.orthogonal_range_search")
         
         # Find canonical subsets from final dimension, extract and combine lists
         # of RangeTreeNodes
@@ -409,6 +442,45 @@ class LayeredRangeTree:
         return [sd_node.dataNode() for sd_node in nodes_in_search_range]
     
     
+    def orthogonal_range_count(self, range_mins:list[L], 
+                               range_maxes:list[L]) -> int:
+        """
+        Count the points an orthogonal_range_search would return, by summing 
+        the sizes of the canonical subsets of the final dimension rather than 
+        collecting their leaves. Takes O(log^d n) time.
+
+        Args:
+            range_mins, range_maxes (list[type[L]]): 
+                As in orthogonal_range_search.
+                
+        Raises: InvalidInputException: 
+            Unless range_mins & range_maxes contain bounds for each dimension.
+                
+        Returns: int: Number of points located between the locations specified 
+            in range_mins and range_maxes.   """
+        
+        check_range_bounds(range_mins, range_maxes, self._dimensionality,
+                           "LayeredRangeTree.orthogonal_range_count")
+        return sum(range_tree_node.size() for range_tree_node in 
+                   self._search_rec(self._root, 1, range_mins, range_maxes))
+    
+    
+    def memory_report(self) -> dict[str, dict[str, int]]:
+        """
+        Walk the built LayeredRangeTree and report the memory it holds, by 
+        category.
+        
+        The trees of the final two dimensions are not built yet (see 
+        _build_range_tree), so the walk covers those of the prior ones, while 
+        the estimate is that of the finished structure.
+
+        Returns: dict[str, dict[str, int]]: 
+            See Utils.MemoryUtils.range_tree_memory_report.   """
+        
+        return range_tree_memory_report(
+            self._root, self._dimensionality, self._leaf_indices)
+    
+
     def _assign_all_parents(self, cur_root:RangeTreeNode=None) -> None:
         """
         TODO:  This method should not be necessary.
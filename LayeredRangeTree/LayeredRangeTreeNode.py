@@ -24,7 +24,12 @@ class RangeTreeNode:
             Pointer to a range tree whose root the same data but ordered by the
             following demension.
         
-        _p (RangeTreeNode): The parent of this RangeTreeNode.   """
+        _p (RangeTreeNode): The parent of this RangeTreeNode.
+        
+        _size (int): Number of leaves in the subtree of this RangeTreeNode.   """
+    
+    __slots__ = ("_single_dim_node", "_l_child", "_r_child",
+                 "_next_dim_subtree", "_p", "_size")
     
     def __init__(self, node_data:SingleDimNode, 
                  left_child:'RangeTreeNode'=None,
@@ -42,6 +47,9 @@ class RangeTreeNode:
         
         self._next_dim_subtree = next_dimension_subtree
         self._p = None
+        self._size = 1 if left_child is None and right_child is None else \
+            (left_child.size() if left_child else 0) + \
+                (right_child.size() if right_child else 0)
     
     def next_dimension_subtree(self) -> 'RangeTreeNode':
         """
@@ -50,6 +58,12 @@ class RangeTreeNode:
             following demension.    """
         return self._next_dim_subtree
     
+    def size(self) -> int:
+        """
+        Returns: int: Number of leaves in the subtree of this RangeTreeNode, 
+            as of its construction.    """
+        return self._size
+    
     def dimension(self) -> int:
         """Returns: int: the dimension of the location of this RangeTreeNode. """
         return self._single_dim_node.dim()
@@ -186,9 +200,6 @@ class RangeTreeNode:
         return ret + f" {pretty_list(self.get_leaves(mode=6), '(', ')')}"
     
     def __str__(self) -> str:
-        if self._color is not None: # Red black tree experiment
-            return f"(Color: {self._color}, " + str(self._single_dim_node)[1:]
-        
         return str(self._single_dim_node)
     
     def __repr__(self) -> str:
@@ -222,6 +233,9 @@ class RangeTreeNode:
 
 class LayeredRangeTreeSubNode:
     
+    __slots__ = ("_node_data", "_layered_range_tree_node", "_left_child",
+                 "_right_child")
+    
     def __init__(self, node_data:SingleDimNode, 
                  full_lrt_node:'LayeredRangeTreeNode') -> None:
         self._node_data = node_data
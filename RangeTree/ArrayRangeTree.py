@@ -0,0 +1,301 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import MutableSequence
+
+from GeneralNodes.DataNode import DataNode
+from GeneralNodes.FullNode import FullNode
+from GeneralNodes.NodeUtils import argsort_keys, presort_dimensions
+from Utils.CustomExceptions import InvalidInputException
+from Utils.GeneralUtils import check_range_bounds, index_typecode
+from Utils.MemoryUtils import MemoryReport, range_tree_node_estimate
+from Utils.TypeUtils import L
+
+
+class ArrayRangeTree:
+    """
+    Read-only, array-backed alternative to RangeTree. It holds the same trees,
+    with the same splits, but keeps them in flat arrays rather than as
+    RangeTreeNode objects, st. a query walks integer offsets instead of
+    chasing pointers between millions of heap objects.
+
+    A tree over m points of some dimension is stored as its m points sorted in
+    that dimension: their locations and their point ids, in consecutive slots
+    of the arrays of that dimension. Its nodes are implicit. A node covers the
+    leaves l through r, and its children cover l through (l + r) // 2 and the
+    rest, as in RangeTree. Numbered in-order, leaf l is node 2l and the
+    internal node splitting its leaves after leaf j is node 2j + 1, so every
+    subtree is a contiguous run of both nodes and leaves.
+
+    Points are numbered by their index in the data set. Dimensions are indexed
+    by (dimension - 1).
+
+    Fields:
+        _dimensionality (int):
+            Dimensionality of the data set represented by this tree.
+
+        _n (int): Number of points.
+
+        _keys (list[MutableSequence[L]]):
+            _keys[d] -> sorted locations of every tree of dimension d + 1,
+            one tree after the other. An array if the locations are numeric,
+            else a list.
+
+        _points (list[array]):
+            _points[d][s] -> id of the point located at _keys[d][s].
+
+        _next (list[array]):
+            _next[d][2b + v] -> position in _keys[d + 1] of the tree of the
+            following dimension of node v of the tree at position b of
+            _keys[d], over the points of that node. Node slots are spaced
+            twice the length of the tree, st. the nodes of a tree are found
+            from its position. None for the last dimension.
+
+        _data_nodes (list[DataNode]): _data_nodes[i] -> DataNode of point i.
+    """
+
+    def __init__(self, data_set:list[FullNode], dimensionality:int) -> None:
+        """
+        Args:
+            data_set (list[FullNode]):
+                List of FullNode instances to be preprocessed into the tree.
+
+            dimensionality (int): The Dimensionality of data_set.
+
+        Raises: InvalidInputException:
+            If data_set is empty or dimensionality is less than 1.  """
+
+        if len(data_set) == 0:
+            raise InvalidInputException(
+                "data_set", "[]", "at least one FullNode", "ArrayRangeTree")
+        if dimensionality < 1:
+            raise InvalidInputException("dimensionality", str(dimensionality),
+                                        "greater than 0", "ArrayRangeTree")
+
+        self._dimensionality = dimensionality
+        self._n = len(data_set)
+        self._data_nodes = [full_node.dataNode() for full_node in data_set]
+        self._build([[full_node.loc(d).loc() for full_node in data_set]
+                     for d in range(1, dimensionality + 1)])
+
+
+    def orthogonal_range_search(self,
+        range_mins:list[L], range_maxes:list[L],
+        sort_on_data_after_query:bool=True) -> list[DataNode]:
+        """
+        Perform an orthogonal range search, as RangeTree.orthogonal_range_search.
+
+        Args:
+            range_mins, range_maxes (list[L]):
+                Low and high (inclusive) bounds of the search for the dimension
+                correlated with each list index plus one.
+
+            sort_on_data_after_query (bool, optional):
+                If true (default), sort results of search on their data fields.
+
+        Raises: InvalidInputException:
+            Unless range_mins & range_maxes hold bounds for each dimension.
+
+        Returns: list[DataNode]:
+            List of DataNode instances located between the locations specified
+            in range_mins and range_maxes.  """
+
+        check_range_bounds(range_mins, range_maxes, self._dimensionality,
+                           "ArrayRangeTree.orthogonal_range_search")
+        found = []  # type: list[int]
+        self._search(range_mins, range_maxes, found)
+        if sort_on_data_after_query:
+            found = [found[i] for i in argsort_keys(
+                [self._data_nodes[point].data() for point in found])]
+        return [self._data_nodes[point] for point in found]
+
+
+    def orthogonal_range_count(self, range_mins:list[L],
+                               range_maxes:list[L]) -> int:
+        """
+        Count the points an orthogonal_range_search would return, from the
+        lengths of the ranges found in the final dimension. Takes O(log^d n)
+        time.
+
+        Args: range_mins, range_maxes (list[L]): As in orthogonal_range_search.
+
+        Raises: InvalidInputException:
+            Unless range_mins & range_maxes hold bounds for each dimension.
+
+        Returns: int: Number of points in range.   """
+
+        check_range_bounds(range_mins, range_maxes, self._dimensionality,
+                           "ArrayRangeTree.orthogonal_range_count")
+        return self._search(range_mins, range_maxes)
+
+
+    def _search(self, range_mins:list[L], range_maxes:list[L],
+                found:list[int]=None) -> int:
+        """
+        Args: found (list[int], optional):
+            If not None, the ids of the points in range are appended to it.
+
+        Returns: int: Number of points in range.  """
+
+        last_dim = self._dimensionality - 1
+        count = 0
+
+        # Trees still to search, as (dimension index, position, size).
+        trees = [(0, 0, self._n)]
+        while len(trees) > 0:
+            d, base, m = trees.pop()
+
+            # Leaves a through b - 1 of this tree are in range.
+            keys = self._keys[d]
+            a = bisect_left(keys, range_mins[d], base, base + m) - base
+            b = bisect_right(keys, range_maxes[d], base, base + m) - base
+            if a >= b:
+                continue
+            if d == last_dim:
+                count += b - a
+                if found is not None:
+                    found.extend(self._points[d][base + a:base + b])
+                continue
+
+            # Canonical subsets: the highest nodes covering only leaves in
+            # range, whose trees of the following dimension are searched next.
+            next_trees, nodes_base = self._next[d], 2 * base
+            nodes = [(0, m - 1)]
+            while len(nodes) > 0:
+                l, r = nodes.pop()
+                mid = (l + r) // 2
+                if a <= l and r < b:
+                    node = 2 * l if l == r else 2 * mid + 1
+                    trees.append((d + 1, next_trees[nodes_base + node], r - l + 1))
+                    continue
+                if a <= mid:
+                    nodes.append((l, mid))
+                if b > mid + 1:
+                    nodes.append((mid + 1, r))
+
+        return count
+
+
+    def memory_report(self) -> dict[str, dict[str, int]]:
+        """
+        Report the memory held by the tree, by category, as in
+        RangeTree.memory_report:
+            keys -> arrays of locations.
+            point_ids -> arrays of point ids.
+            next_offsets -> arrays of positions of next dimension trees.
+            payloads -> DataNodes and their data values.
+
+        Returns: dict[str, dict[str, int]]:
+            key -> category, "total" or "estimate", pair -> {"objects": count,
+            "bytes": total}. "estimate" holds the node count of the
+            O(n log^(d-1) n) bound of the equivalent RangeTree, with the bytes
+            of the slots encoding that many nodes plus the payloads. Each node
+            takes half a key and point id slot, and one offset slot.  """
+
+        report = MemoryReport(("keys", "point_ids", "next_offsets", "payloads"))
+        report.add_container("keys", self._keys)
+        report.add_container("point_ids", self._points)
+        report.add_container("next_offsets", self._next)
+        report.add_container("payloads", self._data_nodes)
+        for data_node in self._data_nodes:
+            report.add("payloads", data_node)
+            report.add("payloads", data_node.data())
+
+        memory = report.as_dict()
+        estimated_nodes = range_tree_node_estimate(
+            self._n, self._dimensionality)
+        slot_bytes = (_item_bytes(self._keys[0]) + self._points[0].itemsize) / 2
+        if self._dimensionality > 1:
+            slot_bytes += self._next[0].itemsize
+        memory["estimate"] = {
+            "objects": estimated_nodes,
+            "bytes": round(estimated_nodes * slot_bytes) + \
+                memory["payloads"]["bytes"]}
+        return memory
+
+
+    ############################## Setup Methods ###############################
+    def _build(self, locations:list[list[L]]) -> None:
+        """
+        Build the trees of every dimension from the points sorted once up
+        front, splitting the sorted orders of each subset stably in two as in
+        RangeTree._build_range_tree.
+
+        Args: locations (list[list[L]]):
+            locations[d][i] -> location of point i in dimension d + 1.  """
+
+        k, n = self._dimensionality, self._n
+        orders, ranks = presort_dimensions(locations)
+
+        # Every point appears once per tree of a dimension along each path of
+        # trees, which bounds the length of the arrays of every dimension.
+        depth = (n - 1).bit_length() + 1
+        point_typecode = index_typecode(n)
+        keys = [[] for _ in range(k)]     # type: list[list[L]]
+        self._points = [array(point_typecode) for _ in range(k)]
+        self._next = [array(index_typecode(n * depth ** (d + 1)))
+                      for d in range(k - 1)] + [None]
+
+        def build(order:list[int], next_orders:list[list[int]], d:int) -> int:
+            """
+            Append the tree of dimension d + 1 over the points of order, sorted
+            in that dimension, and the trees of its nodes in each following
+            dimension, whose orders are next_orders.
+
+            Returns: int: Position of the tree in the arrays of dimension d + 1.
+            """
+
+            base, m = len(keys[d]), len(order)
+            keys[d].extend([locations[d][point] for point in order])
+            self._points[d].extend(order)
+            if d + 1 == k:
+                return base
+
+            next_trees = self._next[d]
+            next_trees.frombytes(bytes(2 * m * next_trees.itemsize))
+            rank = ranks[d]
+            nodes = [(0, m - 1, next_orders)]
+            while len(nodes) > 0:
+                l, r, node_orders = nodes.pop()
+                mid = (l + r) // 2
+                node = 2 * l if l == r else 2 * mid + 1
+                next_trees[2 * base + node] = \
+                    build(node_orders[0], node_orders[1:], d + 1)
+                if l == r:
+                    continue
+
+                # The left child holds the points ranked no higher than the
+                # last of its leaves.
+                median_rank = rank[order[mid]]
+                l_orders, r_orders = [], []
+                for node_order in node_orders:
+                    l_orders.append(
+                        [i for i in node_order if rank[i] <= median_rank])
+                    r_orders.append(
+                        [i for i in node_order if rank[i] > median_rank])
+                nodes.append((l, mid, l_orders))
+                nodes.append((mid + 1, r, r_orders))
+            return base
+
+        build(orders[0], orders[1:], 0)
+        self._keys = [_compact(dim_keys) for dim_keys in keys]
+
+
+def _compact(keys:list[L]) -> MutableSequence[L]:
+    """
+    Returns: MutableSequence[L]:
+        keys as an array of int64 or float64 if they are all numeric and fit,
+        else keys itself.    """
+    typecode = 'q'
+    for key in keys:
+        if isinstance(key, float):
+            typecode = 'd'
+        elif isinstance(key, bool) or not isinstance(key, int) or \
+                not -2 ** 63 <= key < 2 ** 63:
+            return keys
+    return array(typecode, keys)
+
+
+def _item_bytes(keys:MutableSequence[L]) -> int:
+    """
+    Returns: int: Bytes per location held in keys, as stored.  """
+    return keys.itemsize if isinstance(keys, array) else 8
@@ -1,12 +1,19 @@
+import gc
+from functools import reduce
+from typing import Callable
+
 from GeneralNodes.DataNode import DataNode
 from GeneralNodes.FullNode import FullNode
 from GeneralNodes.NodeUtils import fullNode_list_to_SingleDimNode_matrix, \
-    sort_SingleDimNode_list, sort_SingleDimNode_matrix
+    presort_dimensions, search_tree_leaves, sort_SingleDimNode_list
 from GeneralNodes.SingleDimNode import SingleDimNode
 from RangeTree.RangeTreeNode import RangeTreeNode
-from Utils.CustomExceptions import InvalidDimensionalityException
-from Utils.GeneralUtils import matrix_col_subset
-from Utils.TypeUtils import L
+from Utils.CustomExceptions import InvalidDimensionalityException, \
+    InvalidInputException, MissingFieldException
+from Utils.GeneralUtils import check_range_bounds
+from Utils.MemoryUtils import range_tree_memory_report
+from Utils.SearchKernels import SEARCH_KERNELS, SearchKernel
+from Utils.TypeUtils import D, L
 
 LEFT, RIGHT = 0, 1
 
@@ -20,15 +27,54 @@ class RangeTree:
         _dimensionality (int): 
             Dimensionality of the data set represented by this Range Tree.
         
-        _root (RangeTreeNode): the root node of the Range Tree. """
+        _root (RangeTreeNode): the root node of the Range Tree. 
+        
+        _search_kernel (str): 
+            Name of the SearchKernel (see Utils.SearchKernels) used by 
+            query_range_tree in place of descending the tree. None (default) 
+            to descend the tree.
+        
+        _leaf_indices (dict[int, tuple[list[RangeTreeNode], SearchKernel]]):
+            By dimension, the leaves of the tree of that dimension searched by 
+            query_range_tree, with a kernel over their locations. Built on 
+            first use.
+        
+        _aggregate (Callable[[D, D], D]):
+            Associative and commutative function combining the values of two 
+            subsets of points into the value of their union (eg. operator.add, 
+            min, max), whose result for the leaves of each node of the trees 
+            of the final dimension is stored in that node. None (default) if 
+            aggregates are not kept.
+        
+        _leaf_value (Callable[[D], D]):
+            Function mapping the data of a DataNode to the value its leaf 
+            contributes to _aggregate (eg. lambda data: 1 with operator.add 
+            for a count, though orthogonal_range_count needs no aggregate). 
+            None (default) to aggregate the data itself.  """
     
-    def __init__(self, data_set:list[FullNode], dimensionality:int) -> None:
+    def __init__(self, data_set:list[FullNode], dimensionality:int,
+                 search_kernel:str=None,
+                 aggregate:Callable[[D, D], D]=None,
+                 leaf_value:Callable[[D], D]=None) -> None:
         """
         Args:
             data_set (list[FullNode]): 
                 List of FullNode instances to be preprocessed into Range Tree.
             
-            dimensionality (int): The Dimensionality of data_set. """
+            dimensionality (int): The Dimensionality of data_set. 
+            
+            search_kernel (str, optional): 
+                Name of a SearchKernel for query_range_tree. See Fields. 
+            
+            aggregate (Callable[[D, D], D], optional):
+                Aggregate over the data of each DataNode to precompute for 
+                orthogonal_range_aggregate. See Fields.
+            
+            leaf_value (Callable[[D], D], optional):
+                Value of each DataNode to aggregate. See Fields.  
+        
+        Raises:
+            InvalidInputException: If leaf_value is given without aggregate.  """
         
         if len(data_set) == 0:
             raise Exception("data_set is empty. Cannot construct RangeTree.")
@@ -36,7 +82,26 @@ class RangeTree:
             raise Exception(f"dimensionality value ({dimensionality}) must " + \
                 "be greater than 1.")
         
+        if search_kernel is not None and search_kernel not in SEARCH_KERNELS:
+            raise InvalidInputException("search_kernel", str(search_kernel),
+                                        f"one of {list(SEARCH_KERNELS)}",
+                                        "RangeTree")
+        if aggregate is not None and not callable(aggregate):
+            raise InvalidInputException("aggregate", str(aggregate),
+                                        "a function of two data values",
+                                        "RangeTree")
+        if leaf_value is not None and (aggregate is None or 
+                                       not callable(leaf_value)):
+            raise InvalidInputException("leaf_value", str(leaf_value),
+                                        "a function of one data value, " + \
+                                        "along with an aggregate",
+                                        "RangeTree")
+        
         self._dimensionality = dimensionality
+        self._search_kernel = search_kernel
+        self._aggregate = aggregate
+        self._leaf_value = leaf_value
+        self._leaf_indices = {} # type: dict[int, tuple[list[RangeTreeNode], SearchKernel]]
         self._root = self._build_range_tree(
             fullNode_list_to_SingleDimNode_matrix(data_set))
         
@@ -64,47 +129,87 @@ class RangeTree:
         return cur_root    
     
     
-    def _build_range_tree(self, 
-        cur_subset:list[list[SingleDimNode]], cur_dim:int=1) -> RangeTreeNode:
+    def _build_range_tree(
+        self, data_matrix:list[list[SingleDimNode]]) -> RangeTreeNode:
         """
-        Method to construct the Range Tree.
+        Method to construct the Range Tree. Each dimension is sorted once up 
+        front, after which every node splits the presorted orders of its 
+        subset stably in two, rather than sorting its subset again. Building 
+        then takes O(n log^(d-1) n) time, as many steps as there are nodes.
+        If the tree keeps aggregates, each node of the final dimension 
+        combines those of its children as it is built.
 
         Args:
-            cur_subset (list[list[SingleDimNode]]): 
-                Subset of SingleDimNodes matrix to preprocess into Range Tree.
-                
-            cur_dim (int, optional): 
-                The current dimension of the RangeTreeNode being constructed. 
+            data_matrix (list[list[SingleDimNode]]): 
+                Matrix of SingleDimNodes to preprocess into Range Tree, as 
+                returned by fullNode_list_to_SingleDimNode_matrix.
 
         Returns: RangeTreeNode: The root of the RangeTree.   """
         
-        # Start by constructing tree in following dimensions.
-        next_dim_subtree = None
-        if cur_dim < self._dimensionality:
-            next_dim_subtree = self._build_range_tree(cur_subset, cur_dim + 1)
-        
-        # Base case - check if leaf:
-        if len(cur_subset[cur_dim - 1]) == 1:
-            return RangeTreeNode(node_data=cur_subset[cur_dim - 1][0],
-                                 next_dimension_subtree=next_dim_subtree)
+        k, n = self._dimensionality, len(data_matrix[0])
+        locations = [[sd_node.loc() for sd_node in data_matrix[d]]
+                     for d in range(k)]
+        
+        orders, ranks = presort_dimensions(locations)
+        aggregate = self._aggregate
+        leaf_value = self._leaf_value
+        
+        def build(cur_order:list[int], l_index:int, r_index:int,
+                  next_orders:list[list[int]], cur_dim:int) -> RangeTreeNode:
+            """
+            Build the tree of dimension cur_dim over the points 
+            cur_order[l_index:r_index + 1], whose orders in each following 
+            dimension are next_orders. Every order of a subset is a 
+            subsequence of the full order of its dimension. """
             
-        # Always sort
-        sort_SingleDimNode_matrix(cur_subset, cur_dim)
-        
-        l_index = 0
-        r_index = len(cur_subset[cur_dim - 1]) - 1
-        m_index = r_index // 2
-        
-        l_subset = matrix_col_subset(cur_subset, l_index, m_index)
-        r_subset = matrix_col_subset(cur_subset, m_index + 1, r_index)
-                    
-        this_root = RangeTreeNode(
-            node_data=l_subset[cur_dim - 1][-1],
-            left_child=self._build_range_tree(l_subset, cur_dim),
-            right_child=self._build_range_tree(r_subset, cur_dim),
-            next_dimension_subtree=next_dim_subtree)
+            # Start by constructing tree in following dimensions.
+            next_dim_subtree = None
+            if cur_dim < k:
+                next_dim_subtree = build(next_orders[0], 0,
+                                         len(next_orders[0]) - 1,
+                                         next_orders[1:], cur_dim + 1)
+            
+            # Base case - check if leaf:
+            if l_index == r_index:
+                leaf = RangeTreeNode(
+                    node_data=data_matrix[cur_dim - 1][cur_order[l_index]],
+                    next_dimension_subtree=next_dim_subtree)
+                if aggregate is not None and cur_dim == k:
+                    leaf.set_aggregate(leaf.get_data() if leaf_value is None 
+                                       else leaf_value(leaf.get_data()))
+                return leaf
             
-        return this_root
+            # The left subset holds the points up to the median in this 
+            # dimension, ie. those ranked no higher than it overall.
+            m_index = (l_index + r_index) // 2
+            rank = ranks[cur_dim - 1]
+            median_rank = rank[cur_order[m_index]]
+            l_orders, r_orders = [], []
+            for order in next_orders:
+                l_orders.append([i for i in order if rank[i] <= median_rank])
+                r_orders.append([i for i in order if rank[i] > median_rank])
+            
+            node = RangeTreeNode(
+                node_data=data_matrix[cur_dim - 1][cur_order[m_index]],
+                left_child=build(cur_order, l_index, m_index, l_orders, cur_dim),
+                right_child=build(
+                    cur_order, m_index + 1, r_index, r_orders, cur_dim),
+                next_dimension_subtree=next_dim_subtree)
+            if aggregate is not None and cur_dim == k:
+                node.set_aggregate(aggregate(node.left_child().aggregate(),
+                                             node.right_child().aggregate()))
+            return node
+        
+        # The nodes refer to each other in cycles (see RangeTreeNode._p), so
+        # allocating O(n log^(d-1) n) of them would trigger repeated full 
+        # passes of the cyclic garbage collector over the growing tree.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return build(orders[0], 0, n - 1, orders[1:], 1)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
     
     
     def orthogonal_range_search(self,
@@ -122,21 +227,15 @@ class RangeTree:
             sort_on_data_after_query (bool, optional): 
                 If true (default), sort results of search on their data fields.
                 
-        Raises: Exceptions: 
-            Ensure range_mins & range_maxes contains bounds for each dimension.
+        Raises: InvalidInputException: 
+            Unless range_mins & range_maxes contain bounds for each dimension.
                 
         Returns: list[DataNode]: 
             List of DataNode instances located between the locations specified 
             in range_mins and range_maxes.  """
         
-        if len(range_mins) != len(range_maxes):
-            raise Exception("orthogonal_range_search method parameters " + \
-                "range_mins and range_maxes must be of equal length.")
-        
-        if len(range_mins) < self._dimensionality:
-            raise Exception("orthogonal_range_search method parameters " + \
-                "range_mins and range_maxes must be of length greater than " + \
-                    "or equal to the dimensionality of this Range Tree.")
+        check_range_bounds(range_mins, range_maxes, self._dimensionality,
+                           "RangeTree.orthogonal_range_search")
         
         # Find canonical subsets from final dimension, extract and combine lists
         # of RangeTreeNodes
@@ -153,6 +252,66 @@ class RangeTree:
         return [sd_node.dataNode() for sd_node in nodes_in_search_range]
     
     
+    def orthogonal_range_count(self, range_mins:list[L], 
+                               range_maxes:list[L]) -> int:
+        """
+        Count the points an orthogonal_range_search would return, by summing 
+        the sizes of the canonical subsets of the final dimension rather than 
+        collecting their leaves. Takes O(log^d n) time.
+
+        Args:
+            range_mins, range_maxes (list[type[L]]): 
+                As in orthogonal_range_search.
+                
+        Raises: InvalidInputException: 
+            Unless range_mins & range_maxes contain bounds for each dimension.
+                
+        Returns: int: Number of points located between the locations specified 
+            in range_mins and range_maxes.   """
+        
+        check_range_bounds(range_mins, range_maxes, self._dimensionality,
+                           "RangeTree.orthogonal_range_count")
+        return sum(range_tree_node.size() for range_tree_node in 
+                   self._search_rec(self._root, 1, range_mins, range_maxes))
+    
+    
+    def orthogonal_range_aggregate(self, range_mins:list[L], 
+                                   range_maxes:list[L]) -> D:
+        """
+        Aggregate the values of the points an orthogonal_range_search would 
+        return, by combining the aggregates stored at the canonical subsets of 
+        the final dimension. Takes O(log^d n) time, whatever the number of 
+        points in range.
+
+        Args:
+            range_mins, range_maxes (list[type[L]]): 
+                As in orthogonal_range_search.
+                
+        Raises: 
+            MissingFieldException: If the tree was built without aggregate.
+            
+            InvalidInputException: 
+                Unless range_mins & range_maxes contain bounds for each 
+                dimension.
+                
+        Returns: D: The aggregate of the values of the points in range (see 
+            _leaf_value), or None 
+            if there are none.   """
+        
+        if self._aggregate is None:
+            raise MissingFieldException("RangeTree", "_aggregate", 
+                "Pass an aggregate function when constructing the RangeTree")
+        check_range_bounds(range_mins, range_maxes, self._dimensionality,
+                           "RangeTree.orthogonal_range_aggregate")
+        
+        canonical_subsets = self._search_rec(
+            self._root, 1, range_mins, range_maxes)
+        if len(canonical_subsets) == 0:
+            return None
+        return reduce(self._aggregate, (range_tree_node.aggregate() 
+                                        for range_tree_node in canonical_subsets))
+    
+    
     def _search_rec(
         self, cur_root:RangeTreeNode, cur_dim:int, 
         range_mins:list[type[L]], range_maxes:list[type[L]]) -> list[RangeTreeNode]:
@@ -309,7 +468,11 @@ class RangeTree:
         while cur_root.dimension() < search_dimension:
             cur_root = cur_root.next_dimension_subtree()
         
-        ret_node = self._query(target, cur_root, predecessor=predecessor)
+        if self._search_kernel is None:
+            ret_node = self._query(target, cur_root, predecessor=predecessor)
+        else:
+            ret_node = search_tree_leaves(cur_root, target, self._search_kernel,
+                                          self._leaf_indices, predecessor)
                 
         if print_result:
             print(f"Search result for {str(target)}:\n" + \
@@ -351,23 +514,43 @@ class RangeTree:
                 
         def handle_left() -> RangeTreeNode:
             if path != None: path.append((LEFT, cur_root))
-            return self._query(target, cur_root.left_child(), path)
+            return self._query(target, cur_root.left_child(), path, predecessor)
         
         def handle_right() -> RangeTreeNode:
             if path != None: path.append((RIGHT, cur_root))
-            return self._query(target, cur_root.right_child(), path)
+            return self._query(target, cur_root.right_child(), path, predecessor)
         
         if cur_root.is_leaf():
             if path != None: path.append((-1, cur_root))
             return cur_root
         elif predecessor:
-            return handle_right() \
-                if target >= cur_root.get_location() else handle_left()
+            if target < cur_root.get_location():
+                return handle_left()
+            leaf = handle_right()
+            if leaf.get_location() > target:
+                # Nothing on the right is at or before target, so its 
+                # predecessor is the last leaf on the left, at this location.
+                leaf = cur_root.left_child()
+                while not leaf.is_leaf():
+                    leaf = leaf.right_child()
+            return leaf
         else:
             return handle_left() \
                 if target <= cur_root.get_location() else handle_right()
 
 
+    def memory_report(self) -> dict[str, dict[str, int]]:
+        """
+        Walk the built RangeTree and report the memory it holds, by category.
+
+        Returns: dict[str, dict[str, int]]: 
+            See Utils.MemoryUtils.range_tree_memory_report.   """
+        
+        return range_tree_memory_report(
+            self._root, self._dimensionality, self._leaf_indices,
+            aggregates=self._aggregate is not None)
+    
+
     def _assign_all_parents(self, cur_root:RangeTreeNode=None) -> None:
         """
         TODO:  This method should not be necessary.
@@ -24,7 +24,21 @@ class RangeTreeNode:
             Pointer to a range tree whose root the same data but ordered by the
             following demension.
         
-        _p (RangeTreeNode): The parent of this RangeTreeNode.   """
+        _p (RangeTreeNode): The parent of this RangeTreeNode.
+        
+        _size (int): Number of leaves in the subtree of this RangeTreeNode.
+        
+        _aggregate (D): 
+            Aggregate of the data of the leaves of this subtree, if its tree 
+            was built with an aggregate function (see RangeTree). Else None.
+        
+        _color (rb_color), _black_node_quota (int):
+            Red-black tree experiment state. None until color_node is called.
+        """
+    
+    __slots__ = ("_single_dim_node", "_l_child", "_r_child",
+                 "_next_dim_subtree", "_p", "_size", "_aggregate", "_color",
+                 "_black_node_quota")
     
     def __init__(self, node_data:SingleDimNode, 
                  left_child:'RangeTreeNode'=None,
@@ -42,6 +56,12 @@ class RangeTreeNode:
         
         self._next_dim_subtree = next_dimension_subtree
         self._p = None
+        self._size = 1 if left_child is None and right_child is None else \
+            (left_child.size() if left_child else 0) + \
+                (right_child.size() if right_child else 0)
+        self._aggregate = None
+        self._color = None
+        self._black_node_quota = None
     
     def next_dimension_subtree(self) -> 'RangeTreeNode':
         """
@@ -50,6 +70,21 @@ class RangeTreeNode:
             following demension.    """
         return self._next_dim_subtree
     
+    def size(self) -> int:
+        """
+        Returns: int: Number of leaves in the subtree of this RangeTreeNode, 
+            as of its construction.    """
+        return self._size
+    
+    def aggregate(self) -> D:
+        """
+        Returns: D: Aggregate of the data of the leaves of this subtree, or 
+            None if it was not computed.    """
+        return self._aggregate
+    
+    def set_aggregate(self, aggregate:D) -> None:
+        self._aggregate = aggregate
+    
     def dimension(self) -> int:
         """Returns: int: the dimension of the location of this RangeTreeNode. """
         return self._single_dim_node.dim()
@@ -230,9 +265,6 @@ class RangeTreeNode:
         
         def __repr__(self) -> str:
             return str(self)
-        
-    _color = None
-    _black_node_quota = None
     
     def is_red(self) -> bool: return self._color == self.rb_color.red
     def is_black(self) -> bool: self._color == self.rb_color.black
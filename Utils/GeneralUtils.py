@@ -1,6 +1,9 @@
-from typing import Iterable, Iterator, List
+from itertools import islice
+from operator import le
+from typing import Iterable, Iterator, List, Sequence
 
-from Utils.CustomExceptions import InvalidInputException, InvalidTypeException
+from Utils.CustomExceptions import InvalidDimensionalityException, \
+    InvalidInputException, InvalidTypeException
 
 class StringContainer:
     
@@ -102,6 +105,75 @@ def matrix_col_subset(matrix:Iterator[Iterator[object]],
     return [sub_list[l_col_index:r_col_index + 1] for sub_list in matrix]
 
 
+def check_dimension_range(start_dim:int, end_dim:int, k:int, owner:str) -> int:
+    """
+    Validate the dimensions start_dim through end_dim of a k-dimensional 
+    structure, as taken by the searches of FCMatrix and FCArrayMatrix.
+
+    Args:
+        start_dim (int), end_dim (int): First and last dimension. end_dim may
+            be None to denote k.
+        
+        k (int): Dimensionality of the structure.
+        
+        owner (str): Name of the structure, for error messages.
+
+    Raises: 
+        InvalidDimensionalityException: If either dimension is invalid.
+        
+        InvalidInputException: If start_dim exceeds end_dim.
+
+    Returns: int: end_dim, or k if it is None.   """
+    
+    end_dim = k if end_dim is None else end_dim
+    for dimension in (start_dim, end_dim):
+        if not 1 <= dimension <= k:
+            raise InvalidDimensionalityException(dimension, k)
+    if start_dim > end_dim:
+        raise InvalidInputException(
+            "start_dim", str(start_dim), f"at most end_dim ({end_dim})", owner)
+    return end_dim
+
+
+def check_range_bounds(range_mins:Sequence[object],
+                       range_maxes:Sequence[object], dimensionality:int,
+                       owner:str) -> None:
+    """
+    Validate the bounds taken by the orthogonal range queries of RangeTree,
+    ArrayRangeTree and LayeredRangeTree.
+
+    Args:
+        range_mins, range_maxes (Sequence[L]): Lower and upper bounds, by 
+            dimension.
+        
+        dimensionality (int): Dimensionality of the tree.
+        
+        owner (str): Name of the query, for error messages.
+
+    Raises: InvalidInputException:
+        Unless range_mins & range_maxes hold bounds for each dimension.    """
+    
+    if len(range_mins) != len(range_maxes) or \
+            len(range_mins) < dimensionality:
+        raise InvalidInputException(
+            "range_mins, range_maxes",
+            f"lengths {len(range_mins)}, {len(range_maxes)}",
+            f"equal lengths of at least {dimensionality}", owner)
+
+
+def is_sorted(values:Sequence[object]) -> bool:
+    """
+    Returns: bool: True if values is in non-decreasing order. Compares each
+        neighbouring pair once, without copying values.   """
+    return all(map(le, values, islice(values, 1, None)))
+
+
+def index_typecode(max_value:int) -> str:
+    """
+    Returns: str: Smallest signed array typecode able to hold max_value.    """
+    return 'i' if max_value < 2 ** 31 else 'q'
+
+
 ################### Utils for Pretty Printing Data Structures ##################
 def pretty_list(l:Iterable, opening_brace:chr='[', closing_brace:chr=']',
                 delim:str=",", left_indent_len=0, line_len_limit=None) -> str:
@@ -0,0 +1,186 @@
+from array import array
+from sys import getsizeof
+from typing import Any, Iterable, Iterator
+
+"""
+Accounting of the memory held by a built structure, shared by the
+memory_report methods of FCMatrix, RangeTree and LayeredRangeTree. Sizes are
+those reported by sys.getsizeof, so each object is counted once for itself and
+not for the objects it refers to. """
+
+
+class MemoryReport:
+    """
+    Object counts and byte totals by category. Objects reachable along more
+    than one path of a structure (eg. a LocationNode referred to by several
+    tree nodes) are counted once, in the first category they are added to.
+
+    Fields:
+        _totals (dict[str, list[int]]):
+            key -> category, pair -> [object count, byte total].
+
+        _seen (set[int]): ids of the objects counted so far.    """
+
+    def __init__(self, categories:Iterable[str]) -> None:
+        """
+        Args: categories (Iterable[str]): Categories to report, in order.  """
+        self._totals = {category: [0, 0] for category in categories}
+        self._seen = set()  # type: set[int]
+
+    def add(self, category:str, obj:Any, distinct:bool=True) -> bool:
+        """
+        Count obj in category, unless it was counted before.
+
+        Args:
+            distinct (bool): If False, count obj even if it was counted
+                before, for values each held on behalf of one owner though
+                their objects may be shared (eg. small ints, or the data value
+                a min or max came from). Defaults to True.
+
+        Returns: bool: True if obj was counted by this call.  """
+        if obj is None or (distinct and id(obj) in self._seen):
+            return False
+        self._seen.add(id(obj))
+        totals = self._totals[category]
+        totals[0] += 1
+        totals[1] += getsizeof(obj)
+        return True
+
+    def add_container(self, category:str, container:Any) -> None:
+        """
+        Count a list, tuple, dict or array, and any such containers nested in
+        it (eg. the levels of a SearchKernel), but not the other objects it
+        holds. Other objects with a __dict__ or __slots__ are counted along
+        with the containers among their attributes (see _attribute_values).
+        """
+
+        stack = [container]
+        while len(stack) > 0:
+            obj = stack.pop()
+            if isinstance(obj, (list, tuple)):
+                if self.add(category, obj):
+                    stack.extend(item for item in obj
+                                 if isinstance(item, (list, tuple, dict, array)))
+            elif isinstance(obj, dict):
+                if self.add(category, obj):
+                    stack.extend(obj.values())
+            elif isinstance(obj, array):
+                self.add(category, obj)
+            elif (hasattr(obj, "__dict__") or hasattr(type(obj), "__slots__")) \
+                    and self.add(category, obj):
+                stack.extend(value for value in _attribute_values(obj)
+                             if isinstance(value, (list, tuple, dict, array)))
+
+    def as_dict(self) -> dict[str, dict[str, int]]:
+        """
+        Returns: dict[str, dict[str, int]]:
+            key -> category or "total", pair -> {"objects": count,
+            "bytes": total}. """
+        report = {category: {"objects": count, "bytes": n_bytes}
+                  for category, (count, n_bytes) in self._totals.items()}
+        report["total"] = {
+            "objects": sum(count for count, _ in self._totals.values()),
+            "bytes": sum(n_bytes for _, n_bytes in self._totals.values())}
+        return report
+
+
+def _attribute_values(obj:Any) -> Iterator[Any]:
+    """
+    Yields: Any: The values of the attributes of obj held in its __dict__, and
+        in the __slots__ of its class and their bases that are set.  """
+    if hasattr(obj, "__dict__"):
+        yield from vars(obj).values()
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__") and hasattr(obj, name):
+                yield getattr(obj, name)
+
+
+def range_tree_memory_report(root:Any, dimensionality:int,
+                             leaf_indices:dict,
+                             aggregates:bool=False) -> dict[str, dict[str, int]]:
+    """
+    Walk a built range tree, of a RangeTree or a LayeredRangeTree, and report
+    the memory it holds, by category:
+        tree_nodes -> RangeTreeNodes of the tree of the first dimension.
+        next_dim_subtrees -> RangeTreeNodes of the trees of all following
+            dimensions.
+        payloads -> SingleDimNodes, DataNodes and LocationNodes held by the
+            tree nodes, with their data and location values.
+        aggregates -> Only if aggregates is set, the aggregate held by each
+            node of the trees of the final dimension, counted once per node
+            (see MemoryReport.add with distinct=False).
+        containers -> Lists and kernels built by query_range_tree.
+
+    Args:
+        root (RangeTreeNode): Root of the tree of the first dimension.
+
+        dimensionality (int): Dimensionality of the tree.
+
+        leaf_indices (dict): The _leaf_indices of the tree.
+
+        aggregates (bool): If True, report the aggregates category.
+            Defaults to False.
+
+    Returns: dict[str, dict[str, int]]:
+        key -> category, "total" or "estimate", pair -> {"objects": count,
+        "bytes": total} (see MemoryReport). "estimate" holds the node count of
+        the O(n log^(d-1) n) bound, with the bytes of that many tree nodes plus
+        the payloads.    """
+
+    report = MemoryReport(("tree_nodes", "next_dim_subtrees", "payloads") + \
+        (("aggregates",) if aggregates else ()) + ("containers",))
+    n = 0
+    stack = [(root, "tree_nodes")]
+    while len(stack) > 0:
+        cur_node, category = stack.pop()
+        report.add(category, cur_node)
+        if category == "tree_nodes" and cur_node.is_leaf():
+            n += 1
+
+        single_dim_node = cur_node.get_single_dim_node()
+        if report.add("payloads", single_dim_node):
+            report.add("payloads", single_dim_node.dataNode())
+            report.add("payloads", single_dim_node.data())
+            report.add("payloads", single_dim_node.locationNode())
+            report.add("payloads", single_dim_node.loc())
+        if aggregates:
+            report.add("aggregates", cur_node.aggregate(), distinct=False)
+
+        for child in (cur_node.left_child(), cur_node.right_child()):
+            if child is not None:
+                stack.append((child, category))
+        if cur_node.next_dimension_subtree() is not None:
+            stack.append((cur_node.next_dimension_subtree(),
+                          "next_dim_subtrees"))
+
+    report.add_container("containers", leaf_indices)
+
+    memory = report.as_dict()
+    estimated_nodes = range_tree_node_estimate(n, dimensionality)
+    memory["estimate"] = {
+        "objects": estimated_nodes,
+        "bytes": estimated_nodes * getsizeof(root) + \
+            memory["payloads"]["bytes"]}
+    return memory
+
+
+def range_tree_node_estimate(n:int, dimensionality:int) -> int:
+    """
+    Number of nodes of a d-dimensional range tree over n points, following
+    the O(n log^(d-1) n) bound: a tree over n points has 2n - 1 nodes, and
+    every point appears in ceil(log2 n) + 1 subtrees of each tree it is in.
+
+    Args:
+        n (int): Number of points.
+
+        dimensionality (int): d.
+
+    Returns: int: Estimated node count over all dimensions.   """
+
+    if n == 0:
+        return 0
+    depth = (n - 1).bit_length() + 1    # ceil(log2 n) + 1
+    return sum((2 * n - 1) * depth ** (d - 1)
+               for d in range(1, dimensionality + 1))
@@ -0,0 +1,245 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Sequence
+
+from Utils.CustomExceptions import InvalidInputException, InvalidTypeException
+from Utils.TypeUtils import L
+
+"""
+Interchangeable layouts of a static sorted sequence of locations, for the
+first-level search of FCMatrix, its trivial_solution, and the range trees.
+Every kernel answers the same two queries as bisect:
+
+    lower_bound(x) -> number of locations less than x
+    upper_bound(x) -> number of locations less than or equal to x
+
+Select one by name with make_search_kernel. Run Benchmarks.SearchKernels to
+compare them on a given machine.   """
+
+
+class SearchKernel:
+    """
+    Plain binary search over the sorted locations. Base of all other kernels.
+
+    Fields: _keys (list[L]): The sorted locations.  """
+
+    def __init__(self, keys:Sequence[L]) -> None:
+        """
+        Args: keys (Sequence[L]): Sorted locations to search. Copied.    """
+        self._keys = list(keys)
+
+    def lower_bound(self, x:L) -> int:
+        """
+        Returns: int: Index of the first location >= x, or the number of
+            locations if there is none.  """
+        return bisect_left(self._keys, x)
+
+    def upper_bound(self, x:L) -> int:
+        """
+        Returns: int: Index of the first location > x, or the number of
+            locations if there is none.  """
+        return bisect_right(self._keys, x)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class EytzingerSearchKernel(SearchKernel):
+    """
+    Locations stored in Eytzinger (breadth-first) order of the implicit binary
+    search tree, st. the children of position i are 2i and 2i + 1. The first
+    levels of every search then share a few cache lines, and the descent is a
+    loop of index arithmetic without bounds to maintain.
+
+    Fields:
+        _n (int): Number of locations.
+
+        _layout (list[L]):
+            _layout[i] -> location at position i of the tree, for 1 <= i <= n.
+            _layout[0] is unused.
+
+        _rank (array):
+            _rank[i] -> index in sorted order of the location at position i.
+            _rank[0] is n, reported when there is no such location.  """
+
+    def __init__(self, keys:Sequence[L]) -> None:
+        n = self._n = len(keys)
+        self._layout = [None] * (n + 1)
+        self._rank = array('q', [0]) * (n + 1)
+        self._rank[0] = n
+
+        # In-order walk of the implicit tree assigns the sorted locations.
+        i, position, stack = 0, 1, []
+        while len(stack) > 0 or position <= n:
+            if position <= n:
+                stack.append(position)
+                position *= 2
+            else:
+                position = stack.pop()
+                self._layout[position] = keys[i]
+                self._rank[position] = i
+                i += 1
+                position = 2 * position + 1
+
+    def lower_bound(self, x:L) -> int:
+        layout, n = self._layout, self._n
+        i = 1
+        while i <= n:
+            i = 2 * i + (layout[i] < x)
+        # Drop the trailing right turns and the last left turn, which was taken
+        # at the answer.
+        return self._rank[i >> (~i & (i + 1)).bit_length()]
+
+    def upper_bound(self, x:L) -> int:
+        layout, n = self._layout, self._n
+        i = 1
+        while i <= n:
+            i = 2 * i + (layout[i] <= x)
+        return self._rank[i >> (~i & (i + 1)).bit_length()]
+
+    def __len__(self) -> int:
+        return self._n
+
+
+class BTreeSearchKernel(SearchKernel):
+    """
+    Static B+ tree over the sorted locations. Each level holds the largest
+    location of every block of _block_size entries in the level below, with
+    the sorted locations themselves as the bottom level. A search binary
+    searches a single block per level, so it touches O(log_B n) blocks instead
+    of O(log n) scattered entries. The default block of 8 locations matches a
+    64 byte cache line of 8 byte locations.
+
+    Fields:
+        _block_size (int): Entries per block.
+
+        _levels (list[list[L]]): Levels from the top (one block) down.   """
+
+    def __init__(self, keys:Sequence[L], block_size:int=8) -> None:
+        """
+        Args:
+            keys (Sequence[L]): Sorted locations to search. Copied.
+
+            block_size (int): Entries per block. Must be at least 2.   """
+
+        if block_size < 2:
+            raise InvalidInputException("block_size", str(block_size),
+                                        "at least 2", "BTreeSearchKernel")
+        self._block_size = block_size
+        self._levels = [list(keys)]
+        while len(self._levels[-1]) > block_size:
+            below = self._levels[-1]
+            self._levels.append(
+                [below[min(start + block_size, len(below)) - 1]
+                 for start in range(0, len(below), block_size)])
+        self._levels.reverse()
+
+    def lower_bound(self, x:L) -> int:
+        return self._search(x, bisect_left)
+
+    def upper_bound(self, x:L) -> int:
+        return self._search(x, bisect_right)
+
+    def _search(self, x:L, bisect_block) -> int:
+        block_size = self._block_size
+        p = 0
+        for level in self._levels:
+            lo = p * block_size
+            hi = min(lo + block_size, len(level))
+            p = bisect_block(level, x, lo, hi)
+            # The largest location of every block below the top one bounds x,
+            # so only the top block can be passed entirely.
+            if p == hi:
+                return len(self._levels[-1])
+        return p
+
+    def __len__(self) -> int:
+        return len(self._levels[-1])
+
+
+class InterpolationSearchKernel(SearchKernel):
+    """
+    Interpolation search for numeric locations. Each probe is placed where x
+    would fall were the locations in the remaining range evenly spread, taking
+    O(log log n) probes on roughly uniform data. Once the range is small, or
+    after log2(n) probes on skewed data, it falls back to binary search, st.
+    the worst case stays O(log n).
+
+    Fields:
+        _keys (list[L]): The sorted locations.
+
+        _max_probes (int): Interpolation probes before falling back.   """
+
+    # Ranges at most this long are finished by binary search.
+    _CUTOFF = 16
+
+    def __init__(self, keys:Sequence[L]) -> None:
+        """
+        Args: keys (Sequence[L]): Sorted int or float locations. Copied.
+
+        Raises: InvalidTypeException: If a location is not an int or float. """
+
+        super().__init__(keys)
+        for key in self._keys:
+            if not isinstance(key, (int, float)):
+                raise InvalidTypeException(
+                    type(key), "int or float locations",
+                    "InterpolationSearchKernel")
+        self._max_probes = max(1, len(self._keys).bit_length())
+
+    def lower_bound(self, x:L) -> int:
+        return self._search(x, False)
+
+    def upper_bound(self, x:L) -> int:
+        return self._search(x, True)
+
+    def _search(self, x:L, upper:bool) -> int:
+        """
+        Args: upper (bool): If True, find upper_bound, else lower_bound.    """
+
+        keys = self._keys
+        # The answer lies in [lo, hi].
+        lo, hi = 0, len(keys)
+        for _ in range(self._max_probes):
+            if hi - lo <= self._CUTOFF:
+                break
+            low_key, high_key = keys[lo], keys[hi - 1]
+            if (x < low_key) if upper else (x <= low_key):
+                return lo
+            if (x >= high_key) if upper else (x > high_key):
+                return hi
+
+            probe = lo + int((x - low_key) * (hi - 1 - lo) / (high_key - low_key))
+            if (keys[probe] <= x) if upper else (keys[probe] < x):
+                lo = probe + 1
+            else:
+                hi = probe
+
+        return (bisect_right if upper else bisect_left)(keys, x, lo, hi)
+
+
+# Kernels by the name given to make_search_kernel.
+SEARCH_KERNELS = {
+    "binary": SearchKernel,
+    "eytzinger": EytzingerSearchKernel,
+    "btree": BTreeSearchKernel,
+    "interpolation": InterpolationSearchKernel,
+}   # type: dict[str, type[SearchKernel]]
+
+
+def make_search_kernel(kind:str, keys:Sequence[L]) -> SearchKernel:
+    """
+    Args:
+        kind (str): One of the names in SEARCH_KERNELS.
+
+        keys (Sequence[L]): Sorted locations to search.
+
+    Raises: InvalidInputException: If kind is not a known kernel.
+
+    Returns: SearchKernel: Kernel of that kind over keys.   """
+
+    if kind not in SEARCH_KERNELS:
+        raise InvalidInputException("search_kernel", str(kind),
+                                    f"one of {list(SEARCH_KERNELS)}",
+                                    "make_search_kernel")
+    return SEARCH_KERNELS[kind](keys)
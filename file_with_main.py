@@ -6,6 +6,7 @@ from RangeTree.RangeTreeVisualization import visualize_range_tree
 
 
 from FractionalCascading.FCMatrix import FCMatrix
+from FractionalCascading.FCArrayMatrix import FCArrayMatrix
 
 if __name__ == "__main__":
     # print(rand_unique_ints(10, 10, 20))
@@ -31,6 +32,9 @@ if __name__ == "__main__":
     fc_matrix = FCMatrix(full_nodes)
     print(fc_matrix.fc_matrix_search(target))
     
+    fc_array_matrix = FCArrayMatrix(full_nodes)
+    print(fc_array_matrix.fc_matrix_search(target))
+    
     
     print("Nodes being loaded into the tree (locations in each dimension)")
     for i in full_nodes: